@@ -0,0 +1,50 @@
+"""
+Bounded bulk deletes.
+
+Deleting an arbitrary number of rows in one statement holds locks for the
+whole run, and Django's collector loads every row that has dependents
+before deleting it. These helpers delete in primary-key batches of at most
+``batch_size`` rows, each in its own short transaction.
+
+Within a batch ``QuerySet.delete()`` still picks the cheapest plan: models
+with no signal receivers and no dependents (books) are removed with a
+single raw ``DELETE ... WHERE`` and no SELECT, and the books of a batch of
+authors are cascaded with one such statement. Counts come from the
+statements' row counts, so no separate ``COUNT(*)`` is run.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+
+
+def delete_batch(queryset):
+    with transaction.atomic():
+        _, counts = queryset.delete()
+    return counts
+
+
+def delete_ids(model, ids, batch_size=1000):
+    """Delete rows of ``model`` by primary key; return deletions per model."""
+    ids = sorted(set(ids))
+    deleted = Counter()
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        deleted.update(delete_batch(model.objects.filter(pk__in=batch)))
+    return deleted
+
+
+def delete_range(queryset, batch_size=1000):
+    """Delete every row of ``queryset`` in ascending primary-key ranges."""
+    queryset = queryset.order_by("pk")
+    deleted = Counter()
+    remaining = queryset
+    while True:
+        # The pk closing this batch, found with an index-only lookup.
+        upper = remaining.values_list("pk", flat=True)[batch_size - 1 : batch_size]
+        upper = next(iter(upper), None)
+        if upper is None:
+            deleted.update(delete_batch(remaining))
+            return deleted
+        deleted.update(delete_batch(remaining.filter(pk__lte=upper)))
+        remaining = queryset.filter(pk__gt=upper)
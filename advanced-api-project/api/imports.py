@@ -0,0 +1,143 @@
+"""
+Streaming bulk import of books.
+
+``BookBulkOperationsView`` hands NDJSON and CSV request bodies to
+``import_books``, which reads them record by record from the request
+stream, validates them in chunks and writes each chunk with one
+``bulk_create`` in its own transaction. Memory use depends on the chunk
+size, not on the size of the upload.
+"""
+
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Author, Book
+from .serializers import BookImportSerializer
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl")
+CSV_TYPES = ("text/csv",)
+CSV_FIELDS = ["title", "publication_year", "author"]
+
+
+class RowError(Exception):
+    """A record that could not be parsed into a row."""
+
+
+def read_ndjson(stream):
+    """Yield ``(line_number, record)`` for each non-blank line of ``stream``."""
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, RowError("Invalid JSON.")
+            continue
+        if not isinstance(record, dict):
+            yield number, RowError("Expected a JSON object.")
+            continue
+        yield number, record
+
+
+def read_csv(stream):
+    """Yield ``(line_number, record)`` for each CSV record after the header."""
+    # Undecodable bytes are kept as lone surrogates and reported per record.
+    lines = (line.decode("utf-8-sig", errors="surrogateescape") for line in stream)
+    reader = csv.DictReader(lines)
+    missing = set(CSV_FIELDS) - set(reader.fieldnames or ())
+    if missing:
+        yield 1, RowError(f"Missing CSV columns: {', '.join(sorted(missing))}.")
+        return
+    for record in reader:
+        if not is_utf8(record):
+            yield reader.line_num, RowError("Invalid UTF-8.")
+            continue
+        yield reader.line_num, record
+
+
+def is_utf8(record):
+    """Whether the values of a CSV record were decoded without errors."""
+    values = [value for value in record.values() if isinstance(value, str)]
+    try:
+        "".join(values).encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_chunk(chunk, report):
+    """Validate and insert one chunk of ``(row_number, record)`` pairs."""
+    validator = BookImportSerializer()
+    valid, failures = [], []
+    for number, record in chunk:
+        if isinstance(record, RowError):
+            failures.append((number, {"non_field_errors": [str(record)]}))
+            continue
+        try:
+            valid.append((number, validator.run_validation(record)))
+        except ValidationError as exc:
+            failures.append((number, exc.detail))
+
+    # One query resolves every author referenced by the chunk.
+    author_ids = set(
+        Author.objects.filter(
+            pk__in={data["author"] for _, data in valid}
+        ).values_list("pk", flat=True)
+    )
+    books = []
+    for number, data in valid:
+        if data["author"] not in author_ids:
+            message = f'Invalid pk "{data["author"]}" - object does not exist.'
+            failures.append((number, {"author": [message]}))
+            continue
+        books.append(
+            Book(
+                title=data["title"],
+                publication_year=data["publication_year"],
+                author_id=data["author"],
+            )
+        )
+    # Book.save() is bypassed; BookImportSerializer applies the same checks
+    # as Book.clean().
+    with transaction.atomic():
+        Book.objects.bulk_create(books)
+    report.created += len(books)
+    for number, errors in sorted(failures, key=lambda failure: failure[0]):
+        report.error(number, errors)
+
+
+class ImportReport:
+    """Running totals of an import, keeping at most ``max_errors`` details."""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self):
+        return {"created": self.created, "failed": self.failed, "errors": self.errors}
+
+
+def import_books(stream, content_type, chunk_size=1000, max_errors=100):
+    """Import the NDJSON or CSV ``stream`` and return an ``ImportReport``."""
+    reader = read_csv if content_type in CSV_TYPES else read_ndjson
+    report = ImportReport(max_errors)
+    for chunk in chunked(reader(stream), chunk_size):
+        import_chunk(chunk, report)
+    return report
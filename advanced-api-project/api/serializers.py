@@ -32,6 +32,65 @@ class BookSerializer(serializers.ModelSerializer):
         return value
 
 
+class BookImportSerializer(BookSerializer):
+    """
+    Serializer for rows of a streaming book import.
+    Takes the author as a plain ID so a whole chunk of rows can be checked
+    against the database with a single query.
+    """
+
+    author = serializers.IntegerField()
+
+    class Meta(BookSerializer.Meta):
+        fields = ["title", "publication_year", "author"]
+
+
+class BookBulkUpdateSerializer(BookSerializer):
+    """
+    Serializer for one item of a bulk PATCH.
+    Identifies the book by ``id`` and takes the author as a plain ID, so that
+    targets and authors for the whole request are loaded with one query each.
+    """
+
+    id = serializers.IntegerField()
+    author = serializers.IntegerField(required=False)
+
+    class Meta(BookSerializer.Meta):
+        fields = ["id", "title", "publication_year", "author"]
+
+    def validate(self, attrs):
+        """
+        Require the id even though items are validated as partial updates
+        """
+        if "id" not in attrs:
+            raise serializers.ValidationError(
+                {"id": [self.fields["id"].error_messages["required"]]}
+            )
+        return super().validate(attrs)
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    """
+    Serializer for bulk delete requests.
+    Accepts either a list of ``ids`` or an inclusive ``id_range``.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False
+    )
+    id_range = serializers.ListField(
+        child=serializers.IntegerField(), min_length=2, max_length=2, required=False
+    )
+
+    def validate(self, attrs):
+        """
+        Check that exactly one of ids and id_range is given
+        """
+        if ("ids" in attrs) == ("id_range" in attrs):
+            raise serializers.ValidationError("Provide either ids or id_range")
+        return attrs
+
+
 class AuthorSerializer(serializers.ModelSerializer):
     """
     Serializer for the Author model.
@@ -48,7 +107,23 @@ class AuthorSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """
         Customize the output representation to include the number of books
+
+        Uses the books_count annotation added by the author views, and only
+        counts with a query for instances loaded without it.
         """
         representation = super().to_representation(instance)
-        representation["books_count"] = instance.books.count()
+        books_count = getattr(instance, "books_count", None)
+        if books_count is None:
+            books_count = instance.books.count()
+        representation["books_count"] = books_count
         return representation
+
+
+class AuthorPreviewSerializer(AuthorSerializer):
+    """
+    Serializer for an author with only the first few of their books.
+    Reads the books from the books_preview list prefetched by AuthorDetailView;
+    the rest are listed by the author books endpoint.
+    """
+
+    books = BookSerializer(many=True, read_only=True, source="books_preview")
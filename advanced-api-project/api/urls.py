@@ -5,6 +5,16 @@ urlpatterns = [
     # Author endpoints
     path("authors/", views.AuthorListCreateView.as_view(), name="author-list-create"),
     path("authors/<int:pk>/", views.AuthorDetailView.as_view(), name="author-detail"),
+    path(
+        "authors/<int:pk>/books/",
+        views.AuthorBookListView.as_view(),
+        name="author-books",
+    ),
+    path(
+        "authors/bulk/",
+        views.AuthorBulkOperationsView.as_view(),
+        name="author-bulk-operations",
+    ),
     # Book endpoints
     path("books/", views.BookListCreateView.as_view(), name="book-list-create"),
     path("books/<int:pk>/", views.BookDetailView.as_view(), name="book-detail"),
@@ -1,12 +1,25 @@
 from django.shortcuts import render
-from rest_framework import generics, permissions, filters, status
+from rest_framework import generics, permissions, filters, serializers, status
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from .models import Author, Book
-from .serializers import AuthorSerializer, BookSerializer
+from .serializers import (
+    AuthorPreviewSerializer,
+    AuthorSerializer,
+    BookSerializer,
+    BookBulkUpdateSerializer,
+    BulkDeleteSerializer,
+)
+from .deletion import delete_ids, delete_range
 from .filters import BookFilter
+from .imports import CSV_TYPES, NDJSON_TYPES, import_books
 
 
 # Custom pagination class
@@ -62,6 +75,59 @@ class OperationLoggingMixin:
         instance.delete()
 
 
+def author_queryset():
+    """
+    Authors with what AuthorSerializer needs loaded up front: books_count as
+    an annotation and the nested books in one prefetch query
+    """
+    return Author.objects.annotate(books_count=Count("books")).prefetch_related(
+        "books"
+    )
+
+
+# Custom mixin for bounded bulk deletes
+class BulkDeleteMixin:
+    """
+    Mixin adding a chunked bulk DELETE for ``bulk_delete_model``.
+
+    The body is ``{"ids": [1, 2, 3]}`` or ``{"id_range": [first, last]}``.
+    Rows are deleted at most ``delete_batch_size`` at a time, each batch in
+    its own transaction, and related rows are removed by their CASCADE.
+    """
+
+    bulk_delete_model = None
+    delete_batch_size = 1000
+
+    def delete(self, request):
+        """
+        Delete multiple objects at once
+        """
+        serializer = BulkDeleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.bulk_delete_model
+        if "ids" in serializer.validated_data:
+            deleted = delete_ids(
+                model, serializer.validated_data["ids"], self.delete_batch_size
+            )
+        else:
+            first, last = serializer.validated_data["id_range"]
+            deleted = delete_range(
+                model.objects.filter(pk__range=(first, last)), self.delete_batch_size
+            )
+
+        count = deleted[model._meta.label]
+        return Response(
+            {
+                "message": f"Successfully deleted {count} "
+                f"{model._meta.verbose_name_plural}",
+                "deleted": dict(deleted),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 # Create your views here.
 
 
@@ -72,7 +138,7 @@ class AuthorListCreateView(OperationLoggingMixin, generics.ListCreateAPIView):
     POST: Create a new author
     """
 
-    queryset = Author.objects.all()
+    queryset = author_queryset()
     serializer_class = AuthorSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     pagination_class = StandardResultsSetPagination
@@ -89,10 +155,97 @@ class AuthorDetailView(OperationLoggingMixin, generics.RetrieveUpdateDestroyAPIV
     DELETE: Delete a specific author
     """
 
-    queryset = Author.objects.all()
+    queryset = author_queryset()
     serializer_class = AuthorSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def get_books_limit(self):
+        """
+        Number of books to embed, from ``?books_limit=<n>``, or None to embed all
+
+        Capped at the largest page size of the author books endpoint.
+        """
+        if self.request.method != "GET":
+            return None
+        value = self.request.query_params.get("books_limit")
+        if value is None:
+            return None
+        try:
+            limit = int(value)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise serializers.ValidationError(
+                {"books_limit": "Must be a positive integer."}
+            )
+        return min(limit, StandardResultsSetPagination.max_page_size)
+
+    def get_queryset(self):
+        """
+        With a books limit, only the first books (by id) are prefetched
+        """
+        queryset = super().get_queryset()
+        limit = self.get_books_limit()
+        if limit is not None:
+            queryset = queryset.prefetch_related(None).prefetch_related(
+                Prefetch(
+                    "books",
+                    queryset=Book.objects.order_by("id")[:limit],
+                    to_attr="books_preview",
+                )
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        """
+        Use AuthorPreviewSerializer when the embedded books are limited
+        """
+        if self.get_books_limit() is not None:
+            return AuthorPreviewSerializer
+        return super().get_serializer_class()
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve an author, adding a link to the paginated books endpoint
+        when the embedded books are limited
+        """
+        response = super().retrieve(request, *args, **kwargs)
+        if self.get_books_limit() is not None:
+            response.data["books_url"] = reverse(
+                "author-books", args=[kwargs["pk"]], request=request
+            )
+        return response
+
+
+class AuthorBookListView(generics.ListAPIView):
+    """
+    API endpoint for paging through the books of a specific author.
+    GET: List the author's books, supporting the same filtering, searching
+    and ordering as the book list
+
+    Books are ordered by id unless ``?ordering=`` is given, so pages are stable.
+    """
+
+    serializer_class = BookSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = StandardResultsSetPagination
+    filter_backends = [
+        DjangoFilterBackend,
+        filters.SearchFilter,
+        filters.OrderingFilter,
+    ]
+    filterset_class = BookFilter
+    search_fields = ["title", "author__name"]
+    ordering_fields = ["title", "publication_year", "created_at"]
+    ordering = ["id"]
+
+    def get_queryset(self):
+        """
+        Books of the author in the URL, or a 404 if there is no such author
+        """
+        author = get_object_or_404(Author, pk=self.kwargs["pk"])
+        return Book.objects.filter(author=author)
+
 
 class BookListCreateView(OperationLoggingMixin, generics.ListCreateAPIView):
     """
@@ -172,45 +325,148 @@ class BookDetailView(OperationLoggingMixin, generics.RetrieveUpdateDestroyAPIVie
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class BookBulkOperationsView(APIView):
+class BookBulkOperationsView(BulkDeleteMixin, APIView):
     """
     Custom view for bulk operations on books.
     POST: Create multiple books at once
+    PATCH: Update multiple books at once
     DELETE: Delete multiple books at once
     """
 
     permission_classes = [permissions.IsAuthenticated]
+    bulk_delete_model = Book
+    # Streaming imports are validated and written this many rows at a time
+    import_chunk_size = 1000
+    # At most this many per-row errors are listed in an import report
+    import_max_errors = 100
+    # Rows written per UPDATE statement by bulk PATCH
+    bulk_update_batch_size = 500
 
     def post(self, request):
         """
         Create multiple books at once
+
+        A JSON array is validated and saved as a whole. NDJSON
+        (application/x-ndjson) and CSV (text/csv) bodies are imported as a
+        stream instead: valid rows are saved chunk by chunk and invalid rows
+        are reported by row number.
         """
+        content_type = request.content_type.split(";")[0].strip()
+        if content_type in NDJSON_TYPES + CSV_TYPES:
+            return self.stream_import(request, content_type)
         serializer = BookSerializer(data=request.data, many=True)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def delete(self, request):
+    def stream_import(self, request, content_type):
+        """
+        Import books from an NDJSON or CSV request body without loading it
+        """
+        report = import_books(
+            request.stream or [],
+            content_type,
+            chunk_size=self.import_chunk_size,
+            max_errors=self.import_max_errors,
+        )
+        return Response(
+            report.as_dict(),
+            status=status.HTTP_201_CREATED
+            if report.created
+            else status.HTTP_400_BAD_REQUEST,
+        )
+
+    def patch(self, request):
         """
-        Delete multiple books at once
+        Update multiple books at once
+
+        The body is a list of partial book objects, each with its ``id``.
+        Every item is validated before anything is written; only books
+        whose values actually change are saved.
         """
-        book_ids = request.data.get("ids", [])
-        if not book_ids:
+        if not isinstance(request.data, list) or not request.data:
             return Response(
-                {"error": "No book IDs provided"}, status=status.HTTP_400_BAD_REQUEST
+                {"error": "Expected a non-empty list of books"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        books = Book.objects.filter(id__in=book_ids)
-        count = books.count()
-        books.delete()
-
+        validator = BookBulkUpdateSerializer(partial=True)
+        items, errors = [], []
+        for item in request.data:
+            try:
+                items.append(validator.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                items.append(None)
+                errors.append(exc.detail)
+
+        valid = [item for item in items if item is not None]
+        books = Book.objects.in_bulk([item["id"] for item in valid])
+        author_ids = set(
+            Author.objects.filter(
+                pk__in={item["author"] for item in valid if "author" in item}
+            ).values_list("pk", flat=True)
+        )
+        seen = set()
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            if item["id"] in seen:
+                errors[index] = {"id": [f'Duplicate id "{item["id"]}".']}
+            elif item["id"] not in books:
+                errors[index] = {
+                    "id": [f'Invalid pk "{item["id"]}" - object does not exist.']
+                }
+            elif "author" in item and item["author"] not in author_ids:
+                errors[index] = {
+                    "author": [f'Invalid pk "{item["author"]}" - object does not exist.']
+                }
+            seen.add(item["id"])
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        changed, fields = {}, set()
+        now = timezone.now()
+        for item in valid:
+            book = books[item.pop("id")]
+            # Compare raw column values so the author is not fetched
+            updates = {
+                field: value
+                for field, value in item.items()
+                if getattr(book, Book._meta.get_field(field).attname) != value
+            }
+            if updates:
+                for field, value in updates.items():
+                    setattr(book, Book._meta.get_field(field).attname, value)
+                # bulk_update() does not apply auto_now
+                book.updated_at = now
+                changed[book.pk] = book
+                fields.update(updates)
+
+        if changed:
+            with transaction.atomic():
+                Book.objects.bulk_update(
+                    changed.values(),
+                    sorted(fields) + ["updated_at"],
+                    batch_size=self.bulk_update_batch_size,
+                )
         return Response(
-            {"message": f"Successfully deleted {count} books"},
-            status=status.HTTP_204_NO_CONTENT,
+            {"updated": len(changed), "unchanged": len(books) - len(changed)},
+            status=status.HTTP_200_OK,
         )
 
 
+class AuthorBulkOperationsView(BulkDeleteMixin, APIView):
+    """
+    Custom view for bulk operations on authors.
+    DELETE: Delete multiple authors, and their books, at once
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    bulk_delete_model = Author
+
+
 ["ListView", "UpdateView", "DeleteView"]
 ["from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated"]
 ["from django_filters import rest_framework"]
\ No newline at end of file
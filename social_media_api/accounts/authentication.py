@@ -0,0 +1,187 @@
+"""
+Token authentication with cached token -> user lookups.
+
+DRF's ``TokenAuthentication`` joins ``authtoken_token`` to the user table on
+every request. ``CachedTokenAuthentication`` keeps the result in a
+per-process LRU bounded by ``ACCOUNTS_TOKEN_CACHE_SIZE`` entries and
+``ACCOUNTS_TOKEN_CACHE_TTL`` seconds. If ``ACCOUNTS_TOKEN_CACHE_SHARED``
+names a cache alias, lookups missing locally are tried there before the
+database, so a token is looked up once per cluster rather than per process.
+
+Entries hold the user's columns except ``password``, which is left deferred:
+authentication never reads it, and the hash has no business in a cache
+shared by every process. ``check_password()`` on a cached user loads it.
+
+Deleting a token and saving or deleting a user invalidate their entries
+(see ``signals.py``) in this process and in the shared cache. Nothing is
+broadcast to other processes' LRUs, web or ``runworker`` alike: they drop
+their local copies within ``ACCOUNTS_TOKEN_CACHE_TTL`` seconds, which bounds
+how long a deactivated user or deleted token can still authenticate there.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.fields.files import FieldFile
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+FIELDS = [
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname != "password"
+]
+PK_INDEX = FIELDS.index(User._meta.pk.attname)
+
+
+def user_values(user):
+    """``user``'s column values, as ``Model.from_db()`` takes them."""
+    values = []
+    for name in FIELDS:
+        value = getattr(user, name)
+        values.append(value.name if isinstance(value, FieldFile) else value)
+    return tuple(values)
+
+
+class TokenCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, user_id, values)
+        self._keys_by_user = {}
+        self.hits = self.shared_hits = self.misses = 0
+
+    @property
+    def maxsize(self):
+        return getattr(settings, "ACCOUNTS_TOKEN_CACHE_SIZE", 10000)
+
+    @property
+    def ttl(self):
+        return getattr(settings, "ACCOUNTS_TOKEN_CACHE_TTL", 60)
+
+    @property
+    def shared(self):
+        alias = getattr(settings, "ACCOUNTS_TOKEN_CACHE_SHARED", "")
+        return caches[alias] if alias else None
+
+    def _shared_key(self, key):
+        return f"accounts:token:{key}"
+
+    def _user_key(self, user_id):
+        return f"accounts:token-of:{user_id}"
+
+    def get(self, key):
+        """The cached user for token ``key``, or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _build_user(entry[2])
+            if entry is not None:
+                self._forget(key)
+
+        shared = self.shared
+        values = shared.get(self._shared_key(key)) if shared is not None else None
+        with self._lock:
+            if values is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._store(key, values)
+        return _build_user(values)
+
+    def set(self, key, user):
+        values = user_values(user)
+        shared = self.shared
+        if shared is not None:
+            shared.set_many(
+                {self._shared_key(key): values, self._user_key(user.pk): key},
+                self.ttl,
+            )
+        with self._lock:
+            self._store(key, values)
+
+    def invalidate_token(self, key):
+        with self._lock:
+            self._forget(key)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._forget(key)
+        shared = self.shared
+        if shared is not None:
+            key = shared.get(self._user_key(user_id))
+            if key is not None:
+                shared.delete_many([self._shared_key(key), self._user_key(user_id)])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": (
+                    (self.hits + self.shared_hits) / lookups if lookups else None
+                ),
+            }
+
+    def _store(self, key, values):
+        # Callers hold ``self._lock``.
+        user_id = values[PK_INDEX]
+        self._forget(key)
+        self._entries[key] = (time.monotonic() + self.ttl, user_id, values)
+        self._keys_by_user.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._forget(next(iter(self._entries)))
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1]]
+
+
+def _build_user(values):
+    # A fresh instance per request, so one request's changes to
+    # ``request.user`` never leak into another's.
+    return User.from_db(DEFAULT_DB_ALIAS, FIELDS, values)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        if user is None:
+            # Raises AuthenticationFailed for unknown keys and inactive
+            # users; only valid lookups are cached.
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user)
+            return user, token
+        # Cached users are active: deactivation invalidates their entry.
+        token = Token(key=key, user=user)
+        token._state.adding = False
+        return user, token
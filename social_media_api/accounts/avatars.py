@@ -0,0 +1,86 @@
+"""
+Resized renditions of profile pictures.
+
+Nested user payloads appear on every post, comment and notification, so
+pointing each avatar at the original upload dominates page weight. After an
+upload, ``schedule_renditions`` renders square WebP and JPEG copies at every
+``ACCOUNTS_AVATAR_SIZES`` size off the request path and records their
+storage names in ``CustomUser.profile_picture_renditions``.
+"""
+
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from social_media_api.background import run_in_background
+from .authentication import token_cache
+
+User = get_user_model()
+
+FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+
+
+def render(image, size, extension):
+    """``image`` cropped to a ``size`` square and encoded as ``extension``."""
+    rendition = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    if extension == "jpeg":
+        # JPEG has no alpha channel; flatten transparent areas onto white.
+        flattened = Image.new("RGB", rendition.size, "white")
+        flattened.paste(rendition, mask=rendition.getchannel("A"))
+        rendition = flattened
+    buffer = BytesIO()
+    rendition.save(buffer, FORMATS[extension], quality=settings.ACCOUNTS_AVATAR_QUALITY)
+    return buffer.getvalue()
+
+
+def rendition_name(source_name, label, extension):
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    return f"profile_pics/renditions/{stem}_{label}.{extension}"
+
+
+def delete_renditions(renditions):
+    for files in renditions.values():
+        for name in files.values():
+            default_storage.delete(name)
+
+
+def generate_renditions(user_id, source_name):
+    """Render and record the renditions of ``source_name`` for a user."""
+    user = User.objects.filter(pk=user_id, profile_picture=source_name).first()
+    if user is None:
+        # The picture was replaced or removed before this task ran.
+        return
+    with user.profile_picture.open("rb"), Image.open(user.profile_picture) as image:
+        image = ImageOps.exif_transpose(image).convert("RGBA")
+    renditions = {
+        label: {
+            extension: default_storage.save(
+                rendition_name(source_name, label, extension),
+                ContentFile(render(image, size, extension)),
+            )
+            for extension in FORMATS
+        }
+        for label, size in settings.ACCOUNTS_AVATAR_SIZES.items()
+    }
+    # updated_at is bumped so the profile ETag changes with the new URLs.
+    recorded = User.objects.filter(pk=user_id, profile_picture=source_name).update(
+        profile_picture_renditions=renditions, updated_at=timezone.now()
+    )
+    if recorded:
+        token_cache.invalidate_user(user_id)
+    else:
+        delete_renditions(renditions)
+
+
+def schedule_renditions(user, stale_renditions=None):
+    """Render ``user``'s current picture and drop the previous renditions."""
+    if stale_renditions:
+        run_in_background(delete_renditions, stale_renditions)
+    if user.profile_picture:
+        run_in_background(generate_renditions, user.pk, user.profile_picture.name)
@@ -0,0 +1,83 @@
+"""
+Follow and unfollow, keeping the stored counters and the cached graph in step.
+
+``followee.followers`` holds the edge, so a row in the through table has the
+followee in ``from_customuser`` and the follower in ``to_customuser``.
+"""
+
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, When
+from django.db.models.functions import Coalesce
+
+from posts.cache import invalidate_responses
+from social_media_api.db import insert_ignore_conflicts
+from .authentication import token_cache
+from .graph import graph
+
+User = get_user_model()
+Follow = User.followers.through
+
+
+def adjust_follow_counters(follower_id, followee_id, delta):
+    """Add ``delta`` to both ends of one edge in a single UPDATE."""
+    User.objects.filter(pk__in=[follower_id, followee_id]).update(
+        follower_count=F("follower_count")
+        + Case(When(pk=followee_id, then=delta), default=0),
+        following_count=F("following_count")
+        + Case(When(pk=follower_id, then=delta), default=0),
+    )
+    invalidate_cached_users([follower_id, followee_id])
+
+
+def recount_follow_counters(user_ids):
+    """Recompute both counters of ``user_ids`` from the through table."""
+
+    def edge_count(column):
+        rows = (
+            Follow.objects.filter(**{column: OuterRef("pk")})
+            .order_by()
+            .values(column)
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+    User.objects.filter(pk__in=user_ids).update(
+        follower_count=edge_count("from_customuser"),
+        following_count=edge_count("to_customuser"),
+    )
+    invalidate_cached_users(user_ids)
+
+
+def invalidate_cached_users(user_ids):
+    """Drop cached users and anonymous post responses holding stale counters."""
+    for user_id in user_ids:
+        transaction.on_commit(partial(token_cache.invalidate_user, user_id))
+    # Post authors are serialized with their follow counters.
+    invalidate_responses()
+
+
+@transaction.atomic
+def follow(follower, followee):
+    """Make ``follower`` follow ``followee``; ``False`` if it already did."""
+    edge = Follow(from_customuser_id=followee.pk, to_customuser_id=follower.pk)
+    created = insert_ignore_conflicts(edge)
+    if created:
+        adjust_follow_counters(follower.pk, followee.pk, 1)
+        transaction.on_commit(partial(graph.add_edge, follower.pk, followee.pk))
+    return created
+
+
+@transaction.atomic
+def unfollow(follower, followee):
+    """Remove the edge; ``False`` if ``follower`` was not following."""
+    deleted, _ = Follow.objects.filter(
+        from_customuser_id=followee.pk, to_customuser_id=follower.pk
+    ).delete()
+    if deleted:
+        adjust_follow_counters(follower.pk, followee.pk, -1)
+        transaction.on_commit(partial(graph.remove_edge, follower.pk, followee.pk))
+    return bool(deleted)
@@ -0,0 +1,153 @@
+"""
+Cached view of the follower graph.
+
+Each user's follower and following IDs are cached as a sorted ``array('q')``
+(8 bytes per edge), so membership is a binary search and an intersection
+binary-searches the larger array for each ID of the smaller one, instead of
+joining over the through table.
+
+Cached arrays are patched in place when edges change (see ``signals.py``)
+and expire after ``ACCOUNTS_GRAPH_CACHE_TIMEOUT`` seconds, which bounds the
+effect of two processes racing on the same entry.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+User = get_user_model()
+Follow = User.followers.through
+
+# ``followee.followers`` rows: from_customuser is followed by to_customuser.
+FOLLOWEE_COLUMN = "from_customuser_id"
+FOLLOWER_COLUMN = "to_customuser_id"
+
+
+def contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def intersect(a, b):
+    """Sorted intersection of two sorted arrays."""
+    if len(a) > len(b):
+        a, b = b, a
+    return array("q", (value for value in a if contains(b, value)))
+
+
+class FollowerGraph:
+    @property
+    def timeout(self):
+        return getattr(settings, "ACCOUNTS_GRAPH_CACHE_TIMEOUT", 3600)
+
+    def _key(self, direction, user_id):
+        return f"accounts:graph:{direction}:{user_id}"
+
+    def _load(self, direction, user_ids):
+        """Fetch ``{user_id: array}`` for ``direction``, filling cache misses."""
+        keys = {self._key(direction, user_id): user_id for user_id in user_ids}
+        found = {
+            keys[key]: _from_bytes(value)
+            for key, value in cache.get_many(keys).items()
+        }
+        missing = [user_id for user_id in user_ids if user_id not in found]
+        if missing:
+            if direction == "followers":
+                owner, other = FOLLOWEE_COLUMN, FOLLOWER_COLUMN
+            else:
+                owner, other = FOLLOWER_COLUMN, FOLLOWEE_COLUMN
+            loaded = {user_id: array("q") for user_id in missing}
+            rows = (
+                Follow.objects.filter(**{f"{owner}__in": missing})
+                .order_by(owner, other)
+                .values_list(owner, other)
+            )
+            for user_id, other_id in rows.iterator():
+                loaded[user_id].append(other_id)
+            cache.set_many(
+                {
+                    self._key(direction, user_id): ids.tobytes()
+                    for user_id, ids in loaded.items()
+                },
+                self.timeout,
+            )
+            found.update(loaded)
+        return found
+
+    def followers(self, user_id):
+        return self._load("followers", [user_id])[user_id]
+
+    def following(self, user_id):
+        return self._load("following", [user_id])[user_id]
+
+    def follower_count(self, user_id):
+        return len(self.followers(user_id))
+
+    def following_count(self, user_id):
+        return len(self.following(user_id))
+
+    def is_following(self, follower_id, followee_id):
+        return contains(self.following(follower_id), followee_id)
+
+    def mutual_followers(self, user_id, other_id):
+        """Users who follow both ``user_id`` and ``other_id``."""
+        sets = self._load("followers", [user_id, other_id])
+        return intersect(sets[user_id], sets[other_id])
+
+    def suggested_follows(self, user_id, limit=10):
+        """
+        Accounts followed by the accounts ``user_id`` follows, ranked by how
+        many of them follow each one, excluding accounts already followed.
+        """
+        following = self.following(user_id)
+        counts = Counter()
+        for ids in self._load("following", list(following)).values():
+            counts.update(ids)
+        return [
+            candidate_id
+            for candidate_id, _ in sorted(
+                counts.items(), key=lambda item: (-item[1], item[0])
+            )
+            if candidate_id != user_id and not contains(following, candidate_id)
+        ][:limit]
+
+    def _patch(self, direction, user_id, other_id, add):
+        key = self._key(direction, user_id)
+        value = cache.get(key)
+        if value is None:
+            return
+        ids = _from_bytes(value)
+        present = contains(ids, other_id)
+        if add and not present:
+            insort(ids, other_id)
+        elif not add and present:
+            ids.pop(bisect_left(ids, other_id))
+        else:
+            return
+        cache.set(key, ids.tobytes(), self.timeout)
+
+    def add_edge(self, follower_id, followee_id):
+        self._patch("following", follower_id, followee_id, add=True)
+        self._patch("followers", followee_id, follower_id, add=True)
+
+    def remove_edge(self, follower_id, followee_id):
+        self._patch("following", follower_id, followee_id, add=False)
+        self._patch("followers", followee_id, follower_id, add=False)
+
+    def invalidate(self, user_id):
+        cache.delete_many(
+            [self._key("followers", user_id), self._key("following", user_id)]
+        )
+
+
+def _from_bytes(value):
+    ids = array("q")
+    ids.frombytes(value)
+    return ids
+
+
+graph = FollowerGraph()
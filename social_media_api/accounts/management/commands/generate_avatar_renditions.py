@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from accounts.avatars import delete_renditions, generate_renditions
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Render avatar renditions for users whose profile picture has none."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render every profile picture, e.g. after changing sizes.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(profile_picture="").exclude(
+            profile_picture__isnull=True
+        )
+        if not options["all"]:
+            users = users.filter(profile_picture_renditions={})
+
+        rendered = 0
+        for user_id, source_name, stale in users.values_list(
+            "pk", "profile_picture", "profile_picture_renditions"
+        ).iterator():
+            generate_renditions(user_id, source_name)
+            if stale:
+                delete_renditions(stale)
+            rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered avatars for {rendered} users."))
@@ -7,9 +7,19 @@ class CustomUser(AbstractUser):
     profile_picture = models.ImageField(
         upload_to="profile_pics/", null=True, blank=True
     )
+    # Storage names of resized copies of ``profile_picture``, keyed by size
+    # label and then format; filled in the background (accounts/avatars.py).
+    profile_picture_renditions = models.JSONField(
+        default=dict, blank=True, editable=False
+    )
     followers = models.ManyToManyField(
         "self", symmetrical=False, related_name="following", blank=True
     )
+    # Denormalized sizes of ``followers`` and ``following``, updated in the
+    # same transaction as the follow rows.
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.username
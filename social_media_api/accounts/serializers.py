@@ -1,15 +1,41 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.core.files.storage import default_storage
 
 User = get_user_model()
 
 
 class UserSerializer(serializers.ModelSerializer):
+    profile_picture_renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ("id", "username", "email", "bio", "profile_picture")
-        read_only_fields = ("id",)
+        fields = (
+            "id",
+            "username",
+            "email",
+            "bio",
+            "profile_picture",
+            "profile_picture_renditions",
+            "follower_count",
+            "following_count",
+        )
+        read_only_fields = ("id", "follower_count", "following_count")
+
+    def get_profile_picture_renditions(self, obj):
+        # Empty until the background renderer has run; clients fall back to
+        # ``profile_picture`` meanwhile.
+        request = self.context.get("request")
+        renditions = {}
+        for label, files in obj.profile_picture_renditions.items():
+            renditions[label] = {}
+            for extension, name in files.items():
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                renditions[label][extension] = url
+        return renditions
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -0,0 +1,57 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .follows import adjust_follow_counters, recount_follow_counters
+from .graph import graph
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.followers.through)
+def follow_edges_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep counters and the cached graph right for changes made through the
+    ``followers``/``following`` managers (the admin, shell scripts). The API
+    goes through accounts.follows, which does not send this signal.
+    """
+    if action in ("post_add", "post_remove"):
+        delta = 1 if action == "post_add" else -1
+        update = graph.add_edge if action == "post_add" else graph.remove_edge
+        for other_id in pk_set:
+            # ``user.followers.add(x)`` is forward; ``x.following.add(user)``
+            # is the reverse side of the same edge.
+            if reverse:
+                follower_id, followee_id = instance.pk, other_id
+            else:
+                follower_id, followee_id = other_id, instance.pk
+            adjust_follow_counters(follower_id, followee_id, delta)
+            transaction.on_commit(partial(update, follower_id, followee_id))
+    elif action == "pre_clear":
+        related = instance.following if reverse else instance.followers
+        instance._follow_clear_affected = [
+            instance.pk,
+            *related.values_list("pk", flat=True),
+        ]
+    elif action == "post_clear":
+        affected = getattr(instance, "_follow_clear_affected", [instance.pk])
+        recount_follow_counters(affected)
+        for user_id in affected:
+            transaction.on_commit(partial(graph.invalidate, user_id))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(token_cache.invalidate_token, instance.key))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Covers deactivation: cached users are assumed to be active.
+    transaction.on_commit(partial(token_cache.invalidate_user, instance.pk))
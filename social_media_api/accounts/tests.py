@@ -1,3 +1,291 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import time
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .authentication import TokenCache, token_cache
+from .follows import follow, unfollow
+from .graph import graph
+
+User = get_user_model()
+
+
+def upload(name="avatar.png", size=(800, 600)):
+    buffer = BytesIO()
+    Image.new("RGBA", size, (200, 40, 40, 255)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    ACCOUNTS_AVATAR_SIZES={"small": 48, "large": 192},
+)
+class AvatarRenditionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.user = User.objects.create_user("avatar", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload_picture(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"/api/users/{self.user.pk}/",
+                {"profile_picture": upload()},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+
+    @override_settings(BACKGROUND_TASKS_INLINE=True)
+    def test_upload_renders_square_webp_and_jpeg(self):
+        self.upload_picture()
+        renditions = self.user.profile_picture_renditions
+        self.assertEqual(set(renditions), {"small", "large"})
+        for label, edge in (("small", 48), ("large", 192)):
+            for extension, image_format in (("webp", "WEBP"), ("jpeg", "JPEG")):
+                with self.user.profile_picture.storage.open(
+                    renditions[label][extension]
+                ) as f, Image.open(f) as image:
+                    self.assertEqual(image.size, (edge, edge))
+                    self.assertEqual(image.format, image_format)
+
+        response = self.client.get("/api/users/profile/")
+        url = response.data["profile_picture_renditions"]["small"]["webp"]
+        self.assertTrue(url.startswith("http://testserver/media/profile_pics/"))
+
+    @override_settings(BACKGROUND_TASKS_INLINE=True)
+    def test_replacing_picture_deletes_old_renditions(self):
+        self.upload_picture()
+        storage = self.user.profile_picture.storage
+        old = self.user.profile_picture_renditions["small"]["jpeg"]
+        self.upload_picture()
+        self.assertFalse(storage.exists(old))
+        self.assertNotEqual(self.user.profile_picture_renditions["small"]["jpeg"], old)
+
+    @override_settings(BACKGROUND_TASKS_INLINE=True)
+    def test_other_updates_keep_renditions(self):
+        self.upload_picture()
+        renditions = self.user.profile_picture_renditions
+        self.client.patch(f"/api/users/{self.user.pk}/", {"bio": "Hello"})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_picture_renditions, renditions)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ACCOUNTS_TOKEN_CACHE_SHARED="")
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user("reader", password="password")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_repeated_requests_skip_the_token_query(self):
+        self.assertEqual(self.client.get("/api/users/profile/").status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/users/profile/")
+        self.assertEqual(response.data["username"], "reader")
+        stats = token_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get("/api/users/profile/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        self.assertEqual(self.client.get("/api/users/profile/").status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get("/api/users/profile/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get("/api/users/profile/").status_code, 401)
+
+    def test_follow_refreshes_cached_counters(self):
+        other = User.objects.create_user("other", password="password")
+        self.client.get("/api/users/profile/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/users/{other.pk}/follow/")
+        response = self.client.get("/api/users/profile/")
+        self.assertEqual(response.data["following_count"], 1)
+
+    def test_entries_expire_and_are_evicted(self):
+        with self.settings(ACCOUNTS_TOKEN_CACHE_TTL=0):
+            token_cache.set(self.token.key, self.user)
+            self.assertIsNone(token_cache.get(self.token.key))
+        with self.settings(ACCOUNTS_TOKEN_CACHE_SIZE=1):
+            token_cache.set("first", self.user)
+            token_cache.set("second", self.user)
+            self.assertIsNone(token_cache.get("first"))
+            self.assertEqual(token_cache.get("second"), self.user)
+
+    @override_settings(ACCOUNTS_TOKEN_CACHE_SHARED="default")
+    def test_password_hash_is_not_cached(self):
+        cache.clear()
+        self.client.get("/api/users/profile/")
+        shared = cache.get(f"accounts:token:{self.token.key}")
+        self.assertIsNotNone(shared)
+        self.assertNotIn(self.user.password, shared)
+
+        user = token_cache.get(self.token.key)
+        self.assertIn("password", user.get_deferred_fields())
+        self.assertTrue(user.check_password("password"))
+
+    @override_settings(ACCOUNTS_TOKEN_CACHE_SHARED="default")
+    def test_other_processes_drop_invalidated_users_within_the_ttl(self):
+        cache.clear()
+        self.client.get("/api/users/profile/")
+        # Another process (a web worker or ``runworker``) deactivates the
+        # user: only its own LRU and the shared cache are invalidated.
+        TokenCache().invalidate_user(self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/api/users/profile/").status_code, 200)
+
+        expired = time.monotonic() + token_cache.ttl + 1
+        with mock.patch("time.monotonic", return_value=expired):
+            response = self.client.get("/api/users/profile/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_stats_are_admin_only(self):
+        self.assertEqual(
+            self.client.get("/api/users/token_cache_stats/").status_code, 403
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+        response = self.client.get("/api/users/token_cache_stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hit_rate", response.data)
+
+
+class FollowerGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol, cls.dave = (
+            User.objects.create_user(name, password="password")
+            for name in ("alice", "bob", "carol", "dave")
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def follow(self, follower, followee):
+        with self.captureOnCommitCallbacks(execute=True):
+            follow(follower, followee)
+
+    def test_membership_and_counts(self):
+        self.follow(self.alice, self.bob)
+        self.follow(self.carol, self.bob)
+        self.assertEqual(
+            list(graph.followers(self.bob.pk)), [self.alice.pk, self.carol.pk]
+        )
+        self.assertTrue(graph.is_following(self.alice.pk, self.bob.pk))
+        self.assertFalse(graph.is_following(self.bob.pk, self.alice.pk))
+        self.assertEqual(graph.follower_count(self.bob.pk), 2)
+        self.assertEqual(graph.following_count(self.alice.pk), 1)
+
+    def test_mutual_followers(self):
+        for follower in (self.alice, self.carol):
+            self.follow(follower, self.bob)
+        for follower in (self.carol, self.dave):
+            self.follow(follower, self.alice)
+        self.assertEqual(
+            list(graph.mutual_followers(self.bob.pk, self.alice.pk)), [self.carol.pk]
+        )
+
+    def test_suggested_follows(self):
+        # Alice follows Bob and Carol; both follow Dave, only Bob follows Carol.
+        self.follow(self.alice, self.bob)
+        self.follow(self.alice, self.carol)
+        self.follow(self.bob, self.dave)
+        self.follow(self.carol, self.dave)
+        self.follow(self.bob, self.alice)
+        self.assertEqual(graph.suggested_follows(self.alice.pk), [self.dave.pk])
+
+    def test_follow_and_unfollow_patch_cached_arrays(self):
+        graph.followers(self.bob.pk)
+        graph.following(self.alice.pk)
+
+        self.follow(self.alice, self.bob)
+        with self.assertNumQueries(0):
+            self.assertEqual(list(graph.followers(self.bob.pk)), [self.alice.pk])
+            self.assertEqual(list(graph.following(self.alice.pk)), [self.bob.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            unfollow(self.alice, self.bob)
+        with self.assertNumQueries(0):
+            self.assertEqual(list(graph.followers(self.bob.pk)), [])
+            self.assertEqual(list(graph.following(self.alice.pk)), [])
+
+    def test_m2m_changes_patch_cached_arrays(self):
+        graph.followers(self.bob.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.following.add(self.bob)
+            self.bob.followers.add(self.carol)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(graph.followers(self.bob.pk)), [self.alice.pk, self.carol.pk]
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.followers.clear()
+        self.assertEqual(list(graph.followers(self.bob.pk)), [])
+        self.assertEqual(list(graph.following(self.carol.pk)), [])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_INLINE=True)
+class FollowCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol = (
+            User.objects.create_user(name, password="password")
+            for name in ("alice", "bob", "carol")
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def counters(self, user):
+        user = User.objects.get(pk=user.pk)
+        return user.follower_count, user.following_count
+
+    def test_follow_and_unfollow_endpoints(self):
+        url = f"/api/users/{self.bob.pk}/"
+        self.assertEqual(self.client.post(url + "follow/").status_code, 201)
+        self.assertEqual(self.client.post(url + "follow/").status_code, 200)
+        self.assertEqual(self.counters(self.alice), (0, 1))
+        self.assertEqual(self.counters(self.bob), (1, 0))
+
+        self.assertEqual(self.client.post(url + "unfollow/").status_code, 204)
+        self.assertEqual(self.client.post(url + "unfollow/").status_code, 204)
+        self.assertEqual(self.counters(self.alice), (0, 0))
+        self.assertEqual(self.counters(self.bob), (0, 0))
+
+    def test_follow_updates_both_counters_in_one_statement(self):
+        # SAVEPOINT, INSERT ... ON CONFLICT DO NOTHING, one UPDATE, RELEASE.
+        with self.assertNumQueries(4):
+            follow(self.alice, self.bob)
+
+    def test_m2m_changes_keep_counters_in_step(self):
+        self.alice.following.add(self.bob, self.carol)
+        self.carol.followers.add(self.bob)
+        self.assertEqual(self.counters(self.alice), (0, 2))
+        self.assertEqual(self.counters(self.carol), (2, 0))
+
+        self.carol.followers.clear()
+        self.assertEqual(self.counters(self.alice), (0, 1))
+        self.assertEqual(self.counters(self.bob), (1, 0))
+        self.assertEqual(self.counters(self.carol), (0, 0))
@@ -4,6 +4,18 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from notifications.dispatch import notify
+from posts.feed import (
+    fanout_threshold,
+    schedule_follower_backfill,
+    schedule_timeline_backfill,
+    schedule_timeline_cleanup,
+)
+from social_media_api.conditional import compute_etag, not_modified, set_validators
+from . import avatars, follows
+from .authentication import token_cache
+from .graph import graph
 from .serializers import UserSerializer, UserRegistrationSerializer
 
 User = get_user_model()
@@ -24,9 +36,76 @@ class UserViewSet(viewsets.ModelViewSet):
             return UserRegistrationSerializer
         return UserSerializer
 
+    def perform_update(self, serializer):
+        if "profile_picture" not in serializer.validated_data:
+            serializer.save()
+            return
+        stale = serializer.instance.profile_picture_renditions
+        user = serializer.save(profile_picture_renditions={})
+        avatars.schedule_renditions(user, stale)
+
     @action(detail=False, methods=["get"])
     def profile(self, request):
-        serializer = self.get_serializer(request.user)
+        user = request.user
+        # Follow counters are updated in SQL without bumping updated_at.
+        etag = compute_etag(
+            user.pk, user.updated_at, user.follower_count, user.following_count
+        )
+        response = not_modified(request, etag)
+        if response is None:
+            response = Response(self.get_serializer(user).data)
+        return set_validators(response, etag, user.updated_at)
+
+    @action(detail=True, methods=["post"])
+    def follow(self, request, pk=None):
+        user = self.get_object()
+        if user == request.user:
+            return Response(
+                {"detail": "You cannot follow yourself."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with transaction.atomic():
+            created = follows.follow(request.user, user)
+            if created:
+                notify(user, request.user, "follow")
+                schedule_timeline_backfill(request.user.pk, user.pk)
+        if not created:
+            return Response(
+                {"detail": f"You already follow {user.username}."},
+                status=status.HTTP_200_OK,
+            )
+        return Response(
+            {"detail": f"You are now following {user.username}."},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=True, methods=["post"])
+    def unfollow(self, request, pk=None):
+        user = self.get_object()
+        if follows.unfollow(request.user, user):
+            schedule_timeline_cleanup(request.user.pk, user.pk)
+            user.refresh_from_db(fields=["follower_count"])
+            # Back at the threshold: the author's posts are no longer merged
+            # in at read time, so copy them into their followers' timelines.
+            if user.follower_count == fanout_threshold():
+                schedule_follower_backfill(user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(
+        detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser]
+    )
+    def token_cache_stats(self, request):
+        """Hit statistics of this process's token authentication cache."""
+        return Response(token_cache.stats())
+
+    @action(detail=False, methods=["get"])
+    def suggestions(self, request):
+        """Accounts followed by the people you follow, most shared first."""
+        user_ids = graph.suggested_follows(request.user.pk)
+        users = User.objects.in_bulk(user_ids)
+        serializer = self.get_serializer(
+            [users[pk] for pk in user_ids if pk in users], many=True
+        )
         return Response(serializer.data)
 
     def create(self, request, *args, **kwargs):
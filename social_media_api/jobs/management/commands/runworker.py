@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=0,
+            help="Size of the process pool jobs run in; 0 runs them in this process.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when no job is due.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for new jobs.",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            processes=options["processes"], poll_interval=options["poll_interval"]
+        )
+        self.stdout.write(f"Worker {worker.name} started.")
+        worker.run(burst=options["burst"])
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker.name} stopped."))
@@ -0,0 +1,23 @@
+"""
+Entry points of ``runworker --processes`` pool processes.
+
+Pool processes are spawned from a fresh interpreter, so this module must be
+importable before Django is set up: models are only imported once
+``setup`` has run.
+"""
+
+import signal
+
+
+def setup():
+    import django
+
+    # Ctrl-C is left to the parent, which lets running jobs finish first.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+
+
+def run(job_id):
+    from .worker import run_job
+
+    return run_job(job_id)
@@ -0,0 +1,44 @@
+"""
+Enqueueing jobs.
+
+A job names a module-level function by its dotted path and carries
+JSON-serializable arguments, so any worker process can import and call it.
+Successful jobs are deleted; failed attempts are retried with exponential
+backoff until ``max_attempts`` is reached (see ``jobs/worker.py``).
+"""
+
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Job
+
+
+def job_name(func):
+    name = f"{func.__module__}.{func.__qualname__}"
+    if "<" in name or func.__qualname__ != func.__name__:
+        raise ValueError(f"{name} is not a module-level function.")
+    return name
+
+
+def enqueue(func, *args, **kwargs):
+    """
+    Insert a job calling ``func(*args, **kwargs)``.
+
+    The row is written in the caller's transaction, so a rollback discards
+    the job and workers only see it once the transaction commits.
+    """
+    return Job.objects.create(
+        name=job_name(func),
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def enqueue_on_commit(func, *args, **kwargs):
+    """Enqueue ``func(*args, **kwargs)`` once the current transaction commits."""
+    # Fail in the request, not in the commit hook, on an unusable function.
+    job_name(func)
+    transaction.on_commit(partial(enqueue, func, *args, **kwargs))
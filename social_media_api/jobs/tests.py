@@ -0,0 +1,173 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from notifications.models import Notification
+from posts.models import Post, TimelineEntry
+from .models import Job
+from .queue import enqueue, enqueue_on_commit
+from .worker import Worker, retry_delay, run_job
+
+User = get_user_model()
+
+calls = []
+
+
+def record_call(*args, **kwargs):
+    calls.append((args, kwargs))
+
+
+def fail():
+    raise RuntimeError("boom")
+
+
+@override_settings(JOBS_RETRY_BACKOFF=5, JOBS_RETRY_BACKOFF_MAX=60)
+class WorkerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_on_commit_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            enqueue_on_commit(record_call, 1, flag=True)
+            self.assertFalse(Job.objects.exists())
+        callbacks[0]()
+        job = Job.objects.get()
+        self.assertEqual(job.name, "jobs.tests.record_call")
+        self.assertEqual((job.args, job.kwargs), ([1], {"flag": True}))
+
+    def test_rejects_functions_that_cannot_be_imported(self):
+        with self.assertRaises(ValueError):
+            enqueue(lambda: None)
+
+    def test_successful_jobs_run_once_and_are_deleted(self):
+        enqueue(record_call, 1, flag=True)
+        self.assertEqual(Worker().run_pending(), 1)
+        self.assertEqual(calls, [((1,), {"flag": True})])
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(Worker().run_pending(), 0)
+
+    def test_failed_jobs_are_retried_with_backoff(self):
+        job = enqueue(fail)
+        before = timezone.now()
+        with self.assertLogs("jobs.worker", "ERROR"):
+            Worker().run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=5))
+        self.assertIn("RuntimeError: boom", job.last_error)
+        self.assertEqual([retry_delay(n) for n in (1, 2, 3, 5, 10)], [5, 10, 20, 60, 60])
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_jobs_fail_after_max_attempts(self):
+        job = enqueue(fail)
+        for _ in range(2):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            with self.assertLogs("jobs.worker", "ERROR"):
+                Worker().run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_jobs_of_dead_workers_are_reclaimed(self):
+        job = enqueue(record_call)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(Worker().run_pending(), 1)
+        self.assertEqual(len(calls), 1)
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_jobs_that_kill_their_worker_fail_after_max_attempts(self):
+        job = enqueue(record_call)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            attempts=2,
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(Worker().run_pending(), 0)
+        self.assertEqual(calls, [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_pool_is_restarted_when_a_process_dies(self):
+        first, second = enqueue(record_call, 1), enqueue(record_call, 2)
+        worker = Worker(processes=1, poll_interval=0)
+        with patch("jobs.worker.ProcessPoolExecutor", InlineExecutor):
+            InlineExecutor.broken_pools = 1
+            with self.assertLogs("jobs.worker", "ERROR"):
+                worker._run_pool(burst=True)
+        # The job lost with the first pool is retried later; the next one ran.
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), (Job.PENDING, 1))
+        self.assertIn("pool process", first.last_error)
+        self.assertEqual(calls, [((2,), {})])
+        self.assertFalse(Job.objects.filter(pk=second.pk).exists())
+
+
+class InlineExecutor:
+    """Stands in for ``ProcessPoolExecutor``, running jobs in the test process."""
+
+    broken_pools = 0
+
+    def __init__(self, *args, **kwargs):
+        self.broken = InlineExecutor.broken_pools > 0
+        InlineExecutor.broken_pools -= 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def submit(self, func, *args):
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool("A process died."))
+        else:
+            future.set_result(run_job(*args))
+        return future
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_INLINE=False)
+class SideEffectJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.follower = User.objects.create_user("follower", password="password")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_notifications_are_written_in_the_web_process(self):
+        post = Post.objects.create(author=self.author, title="Title", content="Body")
+        self.client.force_authenticate(self.follower)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/posts/{post.pk}/like/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Notification.objects.get().recipient, self.author)
+        self.assertFalse(Job.objects.exists())
+
+    def test_feed_fan_out_is_run_by_the_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.follower.following.add(self.author)
+        self.client.force_authenticate(self.author)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/posts/", {"title": "Title", "content": "Body"}
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Job.objects.get().name, "posts.feed.fan_out_post")
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        call_command("runworker", burst=True, stdout=StringIO())
+        self.assertEqual(TimelineEntry.objects.get().owner, self.follower)
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,185 @@
+"""
+Claiming and running jobs.
+
+``Worker`` claims due jobs in small batches with ``SELECT ... FOR UPDATE
+SKIP LOCKED`` (a plain transaction on SQLite), so several worker processes
+can share one table, and runs them either inline or in a process pool. A
+job whose worker died is reclaimed once its lock is older than
+``JOBS_LOCK_TIMEOUT`` seconds, and counted as a failed attempt: a job that
+keeps killing its worker ends up failed like any other.
+"""
+
+import logging
+import os
+import signal
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import pool
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    delay = settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return min(delay, settings.JOBS_RETRY_BACKOFF_MAX)
+
+
+def run_job(job_id):
+    """Run one claimed job and record the outcome. Returns whether it succeeded."""
+    close_old_connections()
+    try:
+        job = Job.objects.filter(pk=job_id, status=Job.RUNNING).first()
+        if job is None:
+            return False
+        try:
+            import_string(job.name)(*job.args, **job.kwargs)
+        except Exception:
+            logger.exception("Job %s (%s) failed", job.pk, job.name)
+            record_failure(job, traceback.format_exc())
+            return False
+        job.delete()
+        return True
+    finally:
+        close_old_connections()
+
+
+def release_jobs(job_ids, error):
+    """Record a failed attempt for the jobs of ``job_ids`` that are still running."""
+    for job in Job.objects.filter(pk__in=job_ids, status=Job.RUNNING):
+        record_failure(job, error)
+
+
+def record_failure(job, error):
+    if job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED, last_error=error)
+        return
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.PENDING,
+        run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+        locked_at=None,
+        locked_by="",
+        last_error=error,
+    )
+
+
+class Worker:
+    def __init__(self, processes=0, poll_interval=1.0, name=None):
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+
+    def claim(self, limit):
+        """Lock up to ``limit`` due jobs for this worker and return their IDs."""
+        now = timezone.now()
+        stale = Q(
+            status=Job.RUNNING,
+            locked_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT),
+        )
+        due = Q(status=Job.PENDING, run_at__lte=now) | stale
+        with transaction.atomic():
+            # Every claim counted as an attempt, so a job whose worker died
+            # on its last one is not run again.
+            Job.objects.filter(stale, attempts__gte=F("max_attempts")).update(
+                status=Job.FAILED,
+                locked_at=None,
+                locked_by="",
+                last_error="The worker running the last attempt stopped.",
+            )
+            queryset = Job.objects.filter(due).order_by("run_at", "id")
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            job_ids = list(queryset.values_list("pk", flat=True)[:limit])
+            Job.objects.filter(pk__in=job_ids).update(
+                status=Job.RUNNING,
+                locked_at=now,
+                locked_by=self.name,
+                attempts=F("attempts") + 1,
+            )
+        return job_ids
+
+    def run_pending(self):
+        """Run due jobs inline until none are left. Returns how many ran."""
+        ran = 0
+        while job_ids := self.claim(settings.JOBS_CLAIM_BATCH_SIZE):
+            for job_id in job_ids:
+                run_job(job_id)
+            ran += len(job_ids)
+        return ran
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def run(self, burst=False):
+        """Process jobs until stopped, or until the queue is empty if ``burst``."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if self.processes:
+            self._run_pool(burst)
+            return
+        while not self.stopping:
+            if not self.run_pending():
+                if burst:
+                    break
+                time.sleep(self.poll_interval)
+
+    def _run_pool(self, burst):
+        while not self.stopping:
+            # Children must not share the parent's database connections.
+            connections.close_all()
+            running = {}
+            try:
+                self._run_executor(running, burst)
+                return
+            except BrokenProcessPool:
+                # A child that dies (killed, out of memory, ...) breaks the
+                # whole pool: fail the attempts it took down and start over.
+                logger.error("A pool process died; starting a new pool.")
+                release_jobs(list(running), "The pool process running it died.")
+
+    def _run_executor(self, running, burst):
+        """
+        Run jobs in one process pool, tracking them in ``running``
+        (``{job_id: future}``). Raises ``BrokenProcessPool`` if a child dies.
+        """
+        # Leaving the block waits for claimed jobs rather than abandoning them
+        # until their locks expire.
+        with ProcessPoolExecutor(
+            self.processes, mp_context=get_context("spawn"), initializer=pool.setup
+        ) as executor:
+            while not self.stopping:
+                free = self.processes - len(running)
+                job_ids = self.claim(free) if free else []
+                # Tracked before submitting, so a failed submit releases them.
+                running.update(dict.fromkeys(job_ids))
+                for job_id in job_ids:
+                    running[job_id] = executor.submit(pool.run, job_id)
+                if not running:
+                    if burst:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                done, _ = wait(
+                    running.values(),
+                    timeout=self.poll_interval,
+                    return_when=FIRST_COMPLETED,
+                )
+                for job_id, future in list(running.items()):
+                    if future in done:
+                        if isinstance(future.exception(), BrokenProcessPool):
+                            raise future.exception()
+                        del running[job_id]
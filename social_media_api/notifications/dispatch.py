@@ -0,0 +1,199 @@
+"""
+Buffered, coalescing notification writes.
+
+``notify()`` does not touch the database while the request's transaction is
+open. Notifications are collected per transaction and written in one go
+once it commits:
+
+* rows that share a recipient, verb and target are folded together, and
+* an unread row for the same recipient/verb/target created within
+  ``NOTIFICATIONS_COALESCE_WINDOW`` seconds is bumped instead of adding a
+  new one, so a burst of likes reads as "N users liked your post".
+
+After writing, every new or bumped row is published to the recipient's
+notification stream (see ``pubsub.py``) and the unread counters are bumped.
+
+The write is not queued as a job: it is a couple of bulk queries, and the
+publish and counter updates must happen in the web process, where stream
+subscribers and a local-memory cache live, not in a ``runworker`` process.
+
+Outside of a transaction ``notify()`` writes immediately.
+"""
+
+import threading
+import weakref
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Notification
+from .pubsub import get_broker
+from .unread import increment_unread
+
+
+def coalesce_window():
+    return timedelta(seconds=getattr(settings, "NOTIFICATIONS_COALESCE_WINDOW", 3600))
+
+
+def write_notifications(pending):
+    """Persist ``pending`` notification dicts with one query per kind of write."""
+    groups = {}
+    for item in pending:
+        key = (
+            item["recipient_id"],
+            item["verb"],
+            item["content_type_id"],
+            item["object_id"],
+        )
+        group = groups.setdefault(key, {"actor_id": None, "actor_ids": set()})
+        group["actor_id"] = item["actor_id"]
+        group["actor_ids"].add(item["actor_id"])
+    if not groups:
+        return
+
+    candidates = Notification.objects.filter(
+        read=False,
+        created_at__gte=timezone.now() - coalesce_window(),
+        recipient_id__in={key[0] for key in groups},
+        verb__in={key[1] for key in groups},
+    ).order_by("created_at")
+    existing = {
+        (n.recipient_id, n.verb, n.content_type_id, n.object_id): n
+        for n in candidates.only(
+            "recipient", "verb", "content_type", "object_id", "created_at"
+        )
+    }
+
+    to_create, to_update, actor_ids = [], [], []
+    for key, group in groups.items():
+        notification = existing.get(key)
+        if notification is None:
+            recipient_id, verb, content_type_id, object_id = key
+            notification = Notification(
+                recipient_id=recipient_id,
+                verb=verb,
+                content_type_id=content_type_id,
+                object_id=object_id,
+                actor_count=len(group["actor_ids"]),
+            )
+            to_create.append(notification)
+        else:
+            to_update.append(notification)
+        notification.actor_id = group["actor_id"]
+        actor_ids.append((notification, group["actor_ids"]))
+
+    # ``actors`` holds each actor once, so a user who likes, unlikes and
+    # likes again is not counted twice.
+    Actor = Notification.actors.through
+    with transaction.atomic():
+        if to_create:
+            Notification.objects.bulk_create(to_create)
+        Actor.objects.bulk_create(
+            [
+                Actor(notification_id=notification.pk, customuser_id=actor_id)
+                for notification, ids in actor_ids
+                for actor_id in ids
+            ],
+            ignore_conflicts=True,
+        )
+        if to_update:
+            Notification.objects.bulk_update(to_update, ["actor"])
+            updated = Notification.objects.filter(pk__in=[n.pk for n in to_update])
+            updated.update(actor_count=distinct_actor_count())
+            counts = dict(updated.values_list("pk", "actor_count"))
+            for notification in to_update:
+                notification.actor_count = counts[notification.pk]
+
+    new_unread = {}
+    for notification in to_create:
+        recipient_id = notification.recipient_id
+        new_unread[recipient_id] = new_unread.get(recipient_id, 0) + 1
+    increment_unread(new_unread)
+
+    broker = get_broker()
+    for notification in to_create + to_update:
+        broker.publish(notification.recipient_id, stream_message(notification))
+
+
+def distinct_actor_count():
+    """Subquery counting the ``actors`` rows of the outer notification."""
+    rows = (
+        Notification.actors.through.objects.filter(notification=OuterRef("pk"))
+        .order_by()
+        .values("notification")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Subquery(rows, output_field=IntegerField())
+
+
+def stream_message(notification, **overrides):
+    """The payload pushed to subscribers of the notification stream."""
+    message = {
+        "id": notification.pk,
+        "recipient_id": notification.recipient_id,
+        "actor_id": notification.actor_id,
+        "verb": notification.verb,
+        "target_type": None,
+        "target_id": notification.object_id,
+        "actor_count": notification.actor_count,
+        "created_at": notification.created_at.isoformat(),
+    }
+    if notification.content_type_id:
+        content_type = ContentType.objects.get_for_id(notification.content_type_id)
+        message["target_type"] = content_type.model
+    message.update(overrides)
+    return message
+
+
+class NotificationDispatcher:
+    def __init__(self):
+        self._local = threading.local()
+
+    def _buffer(self):
+        """The list collecting notifications for the open transaction."""
+        # Only the registered on-commit callback keeps a buffer alive, so the
+        # weak reference dies once Django runs or drops it on commit or
+        # rollback; each transaction then registers exactly one flush.
+        ref = getattr(self._local, "buffer", None)
+        buffer = ref() if ref is not None else None
+        if buffer is None or buffer.flushed:
+            buffer = _Buffer()
+            self._local.buffer = weakref.ref(buffer)
+            transaction.on_commit(buffer.flush)
+        return buffer
+
+    def notify(self, recipient, actor, verb, target=None):
+        if recipient.pk == actor.pk:
+            return
+        item = {
+            "recipient_id": recipient.pk,
+            "actor_id": actor.pk,
+            "verb": verb,
+            "content_type_id": None,
+            "object_id": None,
+        }
+        if target is not None:
+            item["content_type_id"] = ContentType.objects.get_for_model(target).pk
+            item["object_id"] = target.pk
+
+        if not transaction.get_connection().in_atomic_block:
+            write_notifications([item])
+        else:
+            self._buffer().append(item)
+
+
+class _Buffer(list):
+    flushed = False
+
+    def flush(self):
+        self.flushed = True
+        write_notifications(self)
+
+
+dispatcher = NotificationDispatcher()
+notify = dispatcher.notify
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from notifications.models import Notification
+from notifications.unread import cache_key, cache_timeout
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recount every user's unread notifications into the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users recounted per query.",
+        )
+
+    def handle(self, *args, **options):
+        # A per-process cache would only be filled for this command, which
+        # then exits; the web processes would never see the counts.
+        backend = caches[DEFAULT_CACHE_ALIAS]
+        if isinstance(backend, (LocMemCache, DummyCache)):
+            raise CommandError(
+                "reconcile_unread_counts needs a cache shared with the web "
+                "processes (e.g. Redis or Memcached); the default cache is "
+                f"{type(backend).__name__}."
+            )
+        batch_size = options["batch_size"]
+        last_pk = 0
+        updated = 0
+
+        while True:
+            user_ids = list(
+                User.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+            last_pk = user_ids[-1]
+
+            counts = dict.fromkeys(user_ids, 0)
+            counts.update(
+                Notification.objects.filter(recipient_id__in=user_ids, read=False)
+                .values("recipient_id")
+                .annotate(total=Count("pk"))
+                .values_list("recipient_id", "total")
+            )
+            cache.set_many(
+                {cache_key(user_id): total for user_id, total in counts.items()},
+                cache_timeout(),
+            )
+            updated += len(counts)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Recounted unread notifications for {updated} users.")
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.2 on 2026-10-18 04:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_actors(apps, schema_editor):
+    # Only the latest actor of an already coalesced row is known. Its
+    # actor_count is kept until the row is bumped and recounted.
+    Notification = apps.get_model("notifications", "Notification")
+    Actor = Notification.actors.through
+    rows = Notification.objects.values_list("pk", "actor_id").iterator(chunk_size=1000)
+    batch = []
+    for notification_id, actor_id in rows:
+        batch.append(Actor(notification_id=notification_id, customuser_id=actor_id))
+        if len(batch) >= 1000:
+            Actor.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Actor.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_notification_actor_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actors',
+            field=models.ManyToManyField(blank=True, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_actors, migrations.RunPython.noop),
+    ]
@@ -25,10 +25,35 @@ class Notification(models.Model):
     target = GenericForeignKey("content_type", "object_id")
     created_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
+    # Distinct actors folded into this row by the dispatcher's coalescing;
+    # ``actor`` is the most recent of them and ``actor_count`` their number.
+    actors = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, related_name="+", blank=True
+    )
+    actor_count = models.PositiveIntegerField(default=1)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["recipient", "-created_at", "-id"],
+                name="notif_recipient_created_idx",
+            ),
+            models.Index(
+                fields=["recipient", "read", "-created_at"],
+                name="notif_recipient_read_idx",
+            ),
+            # Unread notifications are a small, hot slice of the table.
+            models.Index(
+                fields=["recipient", "-created_at"],
+                condition=models.Q(read=False),
+                name="notif_unread_idx",
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.actor.username} {self.verb}ed {self.recipient.username}'s {self.target}"
+        actors = self.actor.username
+        if self.actor_count > 1:
+            actors = f"{actors} and {self.actor_count - 1} others"
+        return f"{actors} {self.verb}ed {self.recipient.username}'s {self.target}"
     ["timestamp"]
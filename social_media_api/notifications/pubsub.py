@@ -0,0 +1,105 @@
+"""
+Publish/subscribe for pushing notifications to connected clients.
+
+The backend is chosen with ``NOTIFICATIONS_PUBSUB_BACKEND`` (a dotted path to
+a ``BaseBroker`` subclass). ``InMemoryBroker`` only reaches subscribers in
+the same process, which is enough for a single ASGI worker and for tests;
+multi-process deployments need a broker backed by a shared service.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """Messages published to one user, consumed from an event loop."""
+
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def put(self, message):
+        """Thread-safe: hand ``message`` to the subscriber's event loop."""
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        except RuntimeError:
+            # The subscriber's loop has shut down; it is being torn down.
+            pass
+
+    async def get(self, timeout=None):
+        """Next message, or ``None`` if ``timeout`` seconds pass first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BaseBroker:
+    def publish(self, user_id, message):
+        """Deliver ``message`` (a JSON-serializable dict) to ``user_id``."""
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        """Return a ``Subscription``; must be called from a running loop."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InMemoryBroker(BaseBroker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            backend = getattr(
+                settings,
+                "NOTIFICATIONS_PUBSUB_BACKEND",
+                "notifications.pubsub.InMemoryBroker",
+            )
+            _broker = import_string(backend)()
+        return _broker
@@ -3,11 +3,19 @@ from .models import Notification
 from accounts.serializers import UserSerializer
 
 
+def expands_target(request):
+    """Whether the client asked for targets inline with ``?expand=target``."""
+    if request is None:
+        return False
+    return "target" in request.query_params.get("expand", "").split(",")
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     recipient = UserSerializer(read_only=True)
     actor = UserSerializer(read_only=True)
     target_type = serializers.SerializerMethodField()
     target_id = serializers.SerializerMethodField()
+    target = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
@@ -18,10 +26,17 @@ class NotificationSerializer(serializers.ModelSerializer):
             "verb",
             "target_type",
             "target_id",
+            "target",
+            "actor_count",
             "created_at",
             "read",
         ]
-        read_only_fields = ["id", "created_at"]
+        read_only_fields = ["id", "created_at", "actor_count"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not expands_target(self.context.get("request")):
+            self.fields.pop("target")
 
     def get_target_type(self, obj):
         if obj.content_type:
@@ -30,3 +45,17 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     def get_target_id(self, obj):
         return obj.object_id
+
+    def get_target(self, obj):
+        # Targets are prefetched in bulk by NotificationViewSet when expanded.
+        target = obj.target
+        if target is None:
+            return None
+        summary = {"type": obj.content_type.model, "id": target.pk}
+        if hasattr(target, "title"):
+            summary["title"] = target.title
+        if hasattr(target, "content"):
+            summary["excerpt"] = target.content[:140]
+        if hasattr(target, "post_id"):
+            summary["post_id"] = target.post_id
+        return summary
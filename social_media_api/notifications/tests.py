@@ -0,0 +1,282 @@
+import asyncio
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Like, Post
+
+from .dispatch import notify
+from .models import Notification
+from .unread import cache_key
+
+User = get_user_model()
+
+
+# Notifications must reach the stream and the unread counters without a
+# worker process, so these run with background jobs queued, not inline.
+@override_settings(BACKGROUND_TASKS_INLINE=False)
+class NotificationStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = User.objects.create_user("recipient", password="password")
+        cls.actor = User.objects.create_user("actor", password="password")
+        cls.token = Token.objects.create(user=cls.recipient)
+
+    async def open_stream(self):
+        response = await self.async_client.get(
+            "/api/notifications/stream/",
+            headers={"authorization": f"Token {self.token.key}"},
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        # The first chunk is sent once the stream has subscribed.
+        self.assertIn(b"retry:", await anext(stream))
+        return stream
+
+    def send(self, recipient, actor):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(recipient, actor, "follow")
+
+    async def test_new_notifications_are_pushed(self):
+        stream = await self.open_stream()
+        await sync_to_async(self.send)(self.recipient, self.actor)
+
+        chunk = (await asyncio.wait_for(anext(stream), timeout=5)).decode()
+        self.assertIn("event: notification", chunk)
+        data = json.loads(chunk.split("data: ", 1)[1])
+        self.assertEqual(data["verb"], "follow")
+        self.assertEqual(data["actor_id"], self.actor.pk)
+        await stream.aclose()
+
+    async def test_other_users_notifications_are_not_pushed(self):
+        stream = await self.open_stream()
+        await sync_to_async(self.send)(self.actor, self.recipient)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(anext(stream), timeout=0.2)
+        await stream.aclose()
+
+    def test_requires_an_asgi_server(self):
+        response = self.client.get(
+            "/api/notifications/stream/",
+            headers={"authorization": f"Token {self.token.key}"},
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(response["Content-Type"], "application/json")
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(
+            "/api/notifications/stream/", secure=True
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_INLINE=False)
+class UnreadCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.liker = User.objects.create_user("liker", password="password")
+        cls.post = Post.objects.create(author=cls.author, title="Title", content="Body")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def unread_count(self):
+        return self.client.get("/api/notifications/unread_count/").data["count"]
+
+    def test_cached_count_follows_new_notifications(self):
+        self.assertEqual(self.unread_count(), 0)
+        liker = APIClient()
+        liker.force_authenticate(self.liker)
+        with self.captureOnCommitCallbacks(execute=True):
+            liker.post(f"/api/posts/{self.post.pk}/like/")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 1)
+
+
+class ReconcileUnreadCountsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = User.objects.create_user("recipient", password="password")
+        cls.actor = User.objects.create_user("actor", password="password")
+        Notification.objects.create(
+            recipient=cls.recipient, actor=cls.actor, verb="follow"
+        )
+
+    def test_refuses_a_per_process_cache(self):
+        with self.assertRaises(CommandError):
+            call_command("reconcile_unread_counts", stdout=StringIO())
+
+    def test_recounts_into_a_shared_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            shared = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                }
+            }
+            with override_settings(CACHES=shared):
+                cache.set(cache_key(self.recipient.pk), 7)
+                call_command("reconcile_unread_counts", stdout=StringIO())
+                self.assertEqual(cache.get(cache_key(self.recipient.pk)), 1)
+                self.assertEqual(cache.get(cache_key(self.actor.pk)), 0)
+
+
+class CoalescingDispatchTests(TestCase):
+    """Notifications are written after commit and folded per target."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.likers = [
+            User.objects.create_user(f"liker{i}", password="password")
+            for i in range(3)
+        ]
+        cls.post = Post.objects.create(author=cls.author, title="Title", content="Body")
+        ContentType.objects.get_for_model(Post)
+
+    def test_burst_in_one_transaction_is_one_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                with self.assertNumQueries(0):
+                    for liker in self.likers:
+                        notify(self.author, liker, "like", self.post)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.actor, self.likers[-1])
+
+    def test_unread_row_in_window_is_bumped(self):
+        for liker in self.likers[:2]:
+            with self.captureOnCommitCallbacks(execute=True):
+                notify(self.author, liker, "like", self.post)
+        self.assertEqual(Notification.objects.get().actor_count, 2)
+
+        Notification.objects.update(read=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.author, self.likers[2], "like", self.post)
+        self.assertEqual(
+            list(
+                Notification.objects.order_by("pk").values_list("actor_count", "read")
+            ),
+            [(2, True), (1, False)],
+        )
+
+    @override_settings(NOTIFICATIONS_COALESCE_WINDOW=60)
+    def test_rows_outside_the_window_are_not_bumped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.author, self.likers[0], "like", self.post)
+        Notification.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.author, self.likers[1], "like", self.post)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_self_actions_and_different_targets(self):
+        other = Post.objects.create(author=self.author, title="Other", content="Body")
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                notify(self.author, self.author, "like", self.post)
+                notify(self.author, self.likers[0], "like", self.post)
+                notify(self.author, self.likers[0], "like", other)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_repeated_likes_by_one_user_count_once(self):
+        client = APIClient()
+        client.force_authenticate(self.likers[0])
+        url = f"/api/posts/{self.post.pk}/"
+        for action in ("like", "unlike", "like", "unlike", "like"):
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(url + action + "/")
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.author, self.likers[1], "like", self.post)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(
+            set(notification.actors.all()), {self.likers[0], self.likers[1]}
+        )
+
+    def test_one_flush_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for liker in self.likers:
+                    notify(self.author, liker, "like", self.post)
+        self.assertEqual(len(callbacks), 1)
+        Notification.objects.all().delete()
+
+        # A rolled back transaction drops its buffer with its callback.
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                with transaction.atomic():
+                    notify(self.author, self.likers[0], "like", self.post)
+                    transaction.set_rollback(True)
+                notify(self.author, self.likers[1], "like", self.post)
+        self.assertEqual(len(callbacks), 1)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor, self.likers[1])
+        self.assertEqual(notification.actor_count, 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationListQueryTests(TestCase):
+    """Users and expanded targets are loaded in bulk, not per notification."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = User.objects.create_user("recipient", password="password")
+        cls.actor = User.objects.create_user("actor", password="password")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.recipient)
+
+    def add_notifications(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                author=self.recipient, title=f"Post {i}", content="Body"
+            )
+            comment = Comment.objects.create(
+                post=post, author=self.actor, content="Nice"
+            )
+            like = Like.objects.create(user=self.actor, post=post)
+            for verb, target in (("like", post), ("comment", comment), ("like", like)):
+                Notification.objects.create(
+                    recipient=self.recipient, actor=self.actor, verb=verb, target=target
+                )
+
+    def test_expanded_targets_cost_one_query_per_model(self):
+        # COUNT(*), the page with users and content types, then posts,
+        # comments and likes.
+        self.add_notifications(1)
+        with self.assertNumQueries(5):
+            self.client.get("/api/notifications/", {"expand": "target"})
+        self.add_notifications(2)
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/notifications/", {"expand": "target"})
+        results = response.data["results"]
+        self.assertEqual(len(results), 9)
+        comment = next(item for item in results if item["target_type"] == "comment")
+        self.assertEqual(comment["target"]["excerpt"], "Nice")
+
+    def test_targets_are_only_loaded_when_expanded(self):
+        self.add_notifications(2)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/notifications/")
+        self.assertNotIn("target", response.data["results"][0])
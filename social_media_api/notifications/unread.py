@@ -0,0 +1,60 @@
+"""
+Per-user unread notification counters kept in Django's cache.
+
+The counter is incremented when notification rows are created and reset or
+decremented when they are read, so polling ``unread_count`` is a cache hit.
+Entries expire after ``NOTIFICATIONS_UNREAD_CACHE_TIMEOUT`` seconds and are
+recounted on the next miss, which bounds how long any drift can last;
+``manage.py reconcile_unread_counts`` recounts everyone on demand.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+
+def cache_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def cache_timeout():
+    return getattr(settings, "NOTIFICATIONS_UNREAD_CACHE_TIMEOUT", 300)
+
+
+def count_unread(user_id):
+    return Notification.objects.filter(recipient_id=user_id, read=False).count()
+
+
+def get_unread_count(user_id):
+    count = cache.get(cache_key(user_id))
+    if count is None:
+        count = count_unread(user_id)
+        cache.add(cache_key(user_id), count, cache_timeout())
+    return count
+
+
+def increment_unread(counts):
+    """Add ``{user_id: n}`` to the cached counters that currently exist."""
+    for user_id, n in counts.items():
+        try:
+            cache.incr(cache_key(user_id), n)
+        except ValueError:
+            # Not cached: the next read counts from the table.
+            pass
+
+
+def decrement_unread(user_id):
+    try:
+        if cache.decr(cache_key(user_id)) < 0:
+            cache.delete(cache_key(user_id))
+    except ValueError:
+        pass
+
+
+def reset_unread(user_id):
+    cache.set(cache_key(user_id), 0, cache_timeout())
+
+
+def invalidate_unread(user_id):
+    cache.delete(cache_key(user_id))
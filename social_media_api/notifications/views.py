@@ -1,30 +1,126 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
+from accounts.authentication import CachedTokenAuthentication
+from posts.models import Comment, Like, Post
 from .models import Notification
-from .serializers import NotificationSerializer
+from .pubsub import get_broker
+from .serializers import NotificationSerializer, expands_target
+from .unread import decrement_unread, get_unread_count, invalidate_unread, reset_unread
+
+
+def target_prefetch():
+    """Load the targets of a page of notifications, one query per model."""
+    return GenericPrefetch(
+        "target",
+        [
+            Post.objects.all(),
+            Comment.objects.all(),
+            Like.objects.all(),
+        ],
+    )
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = ["read", "verb"]
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user)
+        queryset = Notification.objects.filter(
+            recipient=self.request.user
+        ).select_related("actor", "recipient", "content_type")
+        if self.action in ("list", "retrieve") and expands_target(self.request):
+            queryset = queryset.prefetch_related(target_prefetch())
+        return queryset
+
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate_unread(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_unread(self.request.user.pk)
 
     @action(detail=False, methods=["post"])
     def mark_all_read(self, request):
-        self.get_queryset().update(read=True)
+        self.get_queryset().filter(read=False).update(read=True)
+        reset_unread(request.user.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=["post"])
     def mark_read(self, request, pk=None):
         notification = self.get_object()
-        notification.read = True
-        notification.save()
+        # Only the request that actually flips the flag adjusts the counter.
+        if Notification.objects.filter(pk=notification.pk, read=False).update(
+            read=True
+        ):
+            decrement_unread(request.user.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=["get"])
     def unread_count(self, request):
-        count = self.get_queryset().filter(read=False).count()
-        return Response({"count": count})
+        # Served from the cache; see notifications/unread.py.
+        return Response({"count": get_unread_count(request.user.pk)})
+
+
+async def stream_user(request):
+    """The user making a stream request, by token or session, or ``None``."""
+    try:
+        credentials = await sync_to_async(CachedTokenAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    if credentials is not None:
+        return credentials[0]
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+async def event_stream(user_id):
+    heartbeat = getattr(settings, "NOTIFICATIONS_STREAM_HEARTBEAT", 15)
+    with get_broker().subscribe(user_id) as subscription:
+        yield "retry: 5000\n\n"
+        while True:
+            message = await subscription.get(timeout=heartbeat)
+            if message is None:
+                # Comment lines keep proxies from closing an idle connection.
+                yield ": keep-alive\n\n"
+                continue
+            yield (
+                f"id: {message['id']}\n"
+                f"event: notification\n"
+                f"data: {json.dumps(message)}\n\n"
+            )
+
+
+async def notification_stream(request):
+    """
+    Server-sent events stream of the caller's new notifications.
+
+    Only served by an ASGI server, where each open stream is an idle
+    coroutine. Under WSGI the response would be buffered in full before
+    anything is sent, so the endless stream would hold a worker forever.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "The notification stream requires an ASGI server."},
+            status=501,
+        )
+    user = await stream_user(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    return StreamingHttpResponse(
+        event_stream(user.pk),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,90 @@
+"""
+Response cache for anonymous post list and detail requests.
+
+Anonymous visitors all see the same representation, so the serialized body
+is cached per URL. Entries are keyed by a generation number that every
+post, comment or like write bumps after commit, as do profile edits and
+follows, because posts embed their author: a bump orphans all older entries
+at once, without enumerating keys, and they age out by timeout.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from social_media_api.conditional import not_modified
+
+GENERATION_KEY = "posts:responses:generation"
+CACHED_HEADERS = ("ETag", "Last-Modified", "Vary")
+
+
+def response_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock so a lost counter never reuses a generation
+        # that cached entries may still be stored under.
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_responses():
+    """Drop every cached response once the current transaction commits."""
+    transaction.on_commit(bump_generation)
+
+
+def response_cache_key(request):
+    """Cache key for ``request``: host, path and sorted query parameters."""
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    url = repr((request.get_host(), request.path, params))
+    digest = hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+    return f"posts:responses:{response_generation()}:{digest}"
+
+
+def cache_anonymous_response(method):
+    """Serve a read-only viewset action from the cache for anonymous users."""
+
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        timeout = settings.POSTS_RESPONSE_CACHE_TIMEOUT
+        if request.user.is_authenticated or timeout <= 0:
+            return method(view, request, *args, **kwargs)
+
+        key = response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            data, headers = cached
+            etag = headers.get("ETag")
+            response = (etag and not_modified(request, etag)) or Response(data)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        response = method(view, request, *args, **kwargs)
+        # 304s and errors carry no body worth keeping.
+        if response.status_code == 200:
+            headers = {
+                header: response[header]
+                for header in CACHED_HEADERS
+                if header in response
+            }
+            cache.set(key, (response.data, headers), timeout)
+        return response
+
+    return wrapper
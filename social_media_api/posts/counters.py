@@ -0,0 +1,33 @@
+"""
+Recounting the stored ``Post.like_count`` and ``Post.comment_count``.
+
+Endpoints normally move the counters by the number of rows they wrote.
+Where that number is not known for sure (concurrent batch replays, repairs),
+the counters are instead set from the rows themselves, counted inside the
+UPDATE so writes committed in the meantime are not overwritten.
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Like, Post
+
+COUNTED_MODELS = {"like_count": Like, "comment_count": Comment}
+
+
+def count_subquery(model):
+    rows = (
+        model.objects.filter(post=OuterRef("pk"))
+        .order_by()
+        .values("post")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def recount_post_counters(post_ids, fields=tuple(COUNTED_MODELS)):
+    """Set ``fields`` of the posts in ``post_ids`` from their rows, in one UPDATE."""
+    Post.objects.filter(pk__in=post_ids).update(
+        **{field: count_subquery(COUNTED_MODELS[field]) for field in fields}
+    )
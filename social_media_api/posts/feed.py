@@ -0,0 +1,187 @@
+"""
+Home feed built from per-user materialized timelines.
+
+Creating a post fans it out to a ``TimelineEntry`` per follower in the
+background, so reading a feed is a single index range scan on the reader's
+own timeline no matter how many accounts they follow. Authors with more than
+``FEED_FANOUT_FOLLOWER_THRESHOLD`` followers are not fanned out; their posts
+are merged into each reader's page at read time instead.
+
+Timelines only hold what was fanned out, so two events copy older posts in:
+following a light author backfills their ``FEED_BACKFILL_POSTS`` newest posts,
+and an author dropping back to the threshold backfills them for every
+follower, since nothing from their heavy period was fanned out.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from social_media_api.background import run_in_background
+from social_media_api.pagination import decode_cursor, encode_cursor, keyset_filter
+from .models import Post, TimelineEntry
+
+User = get_user_model()
+Follow = User.followers.through
+
+
+def fanout_threshold():
+    return getattr(settings, "FEED_FANOUT_FOLLOWER_THRESHOLD", 5000)
+
+
+def fanout_batch_size():
+    return getattr(settings, "FEED_FANOUT_BATCH_SIZE", 1000)
+
+
+def backfill_size():
+    return getattr(settings, "FEED_BACKFILL_POSTS", 20)
+
+
+def _insert_entries(entries):
+    """Bulk insert ``TimelineEntry`` objects in batches, skipping duplicates."""
+    batch_size = fanout_batch_size()
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _follower_ids(author_id):
+    # ``author.followers`` rows have the author on the "from" side.
+    return (
+        Follow.objects.filter(from_customuser_id=author_id)
+        .values_list("to_customuser_id", flat=True)
+        .iterator(chunk_size=fanout_batch_size())
+    )
+
+
+def _recent_posts(author_id):
+    return list(
+        Post.objects.filter(author_id=author_id)
+        .order_by("-created_at", "-pk")
+        .values_list("pk", "created_at")[: backfill_size()]
+    )
+
+
+def schedule_fan_out(post):
+    run_in_background(fan_out_post, post.pk)
+
+
+def fan_out_post(post_id):
+    """Insert ``post_id`` into the timeline of every follower of its author."""
+    post = (
+        Post.objects.filter(pk=post_id)
+        .values("author_id", "created_at", "author__follower_count")
+        .first()
+    )
+    if post is None:
+        return
+    follower_count = post["author__follower_count"]
+    if not follower_count or follower_count > fanout_threshold():
+        return
+
+    _insert_entries(
+        TimelineEntry(
+            owner_id=follower_id, post_id=post_id, created_at=post["created_at"]
+        )
+        for follower_id in _follower_ids(post["author_id"])
+    )
+
+
+def schedule_timeline_backfill(owner_id, author_id):
+    run_in_background(backfill_timeline, owner_id, author_id)
+
+
+def backfill_timeline(owner_id, author_id):
+    """Copy a newly followed author's recent posts into ``owner_id``'s timeline."""
+    follower_count = (
+        User.objects.filter(pk=author_id)
+        .values_list("follower_count", flat=True)
+        .first()
+    )
+    # Heavy authors' posts are merged in at read time.
+    if follower_count is None or follower_count > fanout_threshold():
+        return
+    # The follow may have been undone before this job ran.
+    if not Follow.objects.filter(
+        from_customuser_id=author_id, to_customuser_id=owner_id
+    ).exists():
+        return
+    _insert_entries(
+        TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in _recent_posts(author_id)
+    )
+
+
+def schedule_follower_backfill(author_id):
+    run_in_background(backfill_followers, author_id)
+
+
+def backfill_followers(author_id):
+    """Copy ``author_id``'s recent posts into the timeline of every follower.
+
+    Runs when an author drops back to the fan-out threshold: their posts are
+    no longer merged in at read time, and those written while they were above
+    it were never fanned out.
+    """
+    posts = _recent_posts(author_id)
+    if not posts:
+        return
+    _insert_entries(
+        TimelineEntry(owner_id=follower_id, post_id=post_id, created_at=created_at)
+        for follower_id in _follower_ids(author_id)
+        for post_id, created_at in posts
+    )
+
+
+def heavy_followed_author_ids(user):
+    """Accounts ``user`` follows whose posts are merged in at read time."""
+    return list(
+        user.following.filter(follower_count__gt=fanout_threshold()).values_list(
+            "pk", flat=True
+        )
+    )
+
+
+def schedule_timeline_cleanup(owner_id, author_id):
+    run_in_background(remove_from_timeline, owner_id, author_id)
+
+
+def remove_from_timeline(owner_id, author_id):
+    """Drop an unfollowed author's posts from ``owner_id``'s timeline."""
+    TimelineEntry.objects.filter(owner_id=owner_id, post__author_id=author_id).delete()
+
+
+def get_feed_page(user, cursor=None, page_size=10):
+    """Return ``(post_ids, next_cursor)`` for one page of ``user``'s feed."""
+    entries = TimelineEntry.objects.filter(owner=user)
+    heavy_posts = Post.objects.filter(author__in=heavy_followed_author_ids(user))
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        entries = entries.filter(keyset_filter(created_at, post_id, "post_id"))
+        heavy_posts = heavy_posts.filter(keyset_filter(created_at, post_id))
+
+    # Each source is read in feed order and bounded by the page size, so the
+    # merge below never looks at more than two pages of rows.
+    candidates = dict(
+        entries.order_by("-created_at", "-post_id").values_list(
+            "post_id", "created_at"
+        )[: page_size + 1]
+    )
+    for post_id, created_at in heavy_posts.order_by(
+        "-created_at", "-pk"
+    ).values_list("pk", "created_at")[: page_size + 1]:
+        candidates.setdefault(post_id, created_at)
+
+    ordered = sorted(
+        candidates.items(), key=lambda item: (item[1], item[0]), reverse=True
+    )
+    page = ordered[:page_size]
+    next_cursor = None
+    if len(ordered) > page_size:
+        last_post_id, last_created_at = page[-1]
+        next_cursor = encode_cursor(last_created_at, last_post_id)
+    return [post_id for post_id, _ in page], next_cursor
@@ -0,0 +1,29 @@
+from rest_framework import filters
+
+from .search import get_search_backend
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for ``SearchFilter`` backed by ``posts.search``.
+
+    Matches are annotated with ``search_rank``. Models or databases without
+    a full-text backend keep the ``LIKE`` matching of ``search_fields``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        backend = get_search_backend()
+        if not terms or backend is None or not backend.supports(queryset.model):
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(queryset, " ".join(terms))
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """``OrderingFilter`` that defaults to relevance order for searches."""
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params and "search_rank" in queryset.query.annotations:
+            return ["-search_rank", "-created_at"]
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.cache import invalidate_responses
+from posts.counters import count_subquery, recount_post_counters
+from posts.models import Comment, Like, Post
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.like_count and Post.comment_count where they have drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of posts checked per query and transaction.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pk = 0
+        checked = repaired = 0
+
+        while True:
+            rows = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .annotate(
+                    actual_likes=count_subquery(Like),
+                    actual_comments=count_subquery(Comment),
+                )
+                .values_list(
+                    "pk",
+                    "like_count",
+                    "comment_count",
+                    "actual_likes",
+                    "actual_comments",
+                )[:batch_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            checked += len(rows)
+
+            drifted = [
+                pk
+                for pk, likes, comments, actual_likes, actual_comments in rows
+                if (likes, comments) != (actual_likes, actual_comments)
+            ]
+            if drifted:
+                # Recount inside the UPDATE so writes that landed since the
+                # check above are not overwritten with a stale value.
+                with transaction.atomic():
+                    recount_post_counters(drifted)
+                repaired += len(drifted)
+
+        if repaired:
+            invalidate_responses()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} posts, repaired {repaired}.")
+        )
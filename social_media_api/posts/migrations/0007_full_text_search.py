@@ -0,0 +1,52 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:18
+
+from django.db import migrations
+
+# table -> searchable columns; keep in step with posts.search.DOCUMENTS.
+DOCUMENTS = {
+    "posts_post": ("title", "content"),
+    "posts_comment": ("content",),
+}
+
+
+def pg_document(columns):
+    joined = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"to_tsvector('english'::regconfig, {joined})"
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, columns in DOCUMENTS.items():
+        if vendor == "sqlite":
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5({', '.join(columns)})"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table}_fts (rowid, {', '.join(columns)}) "
+                f"SELECT id, {', '.join(columns)} FROM {table}"
+            )
+        elif vendor == "postgresql":
+            schema_editor.execute(
+                f"CREATE INDEX {table}_search_idx ON {table} "
+                f"USING GIN (({pg_document(columns)}))"
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in DOCUMENTS:
+        if vendor == "sqlite":
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
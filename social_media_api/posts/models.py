@@ -13,9 +13,19 @@ class Post(models.Model):
     likes = models.ManyToManyField(
         settings.AUTH_USER_MODEL, through="Like", related_name="liked_posts"
     )
+    # Denormalized counters, kept in step with the Like and Comment tables
+    # by the views; `manage.py reconcile_post_counters` repairs any drift.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="posts_post_created_idx"),
+            models.Index(
+                fields=["author", "-created_at"], name="posts_post_author_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.author.username}"
@@ -32,6 +42,17 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"], name="posts_comment_created_idx"
+            ),
+            models.Index(
+                fields=["post", "-created_at"], name="posts_comment_post_created_idx"
+            ),
+            models.Index(
+                fields=["author", "-created_at"], name="posts_comment_auth_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
@@ -48,3 +69,32 @@ class Like(models.Model):
 
     def __str__(self):
         return f"{self.user.username} likes {self.post.title}"
+
+
+class TimelineEntry(models.Model):
+    """A post materialized into one follower's home feed.
+
+    ``created_at`` is copied from the post so a feed page is read from this
+    table alone, in ``(created_at, post_id)`` order.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="timeline"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("owner", "post")
+        ordering = ["-created_at", "-post"]
+        indexes = [
+            models.Index(
+                fields=["owner", "-created_at", "-post"],
+                name="posts_timeline_owner_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.post.title} in {self.owner.username}'s feed"
@@ -0,0 +1,134 @@
+"""
+Full-text search for posts and comments.
+
+The backend follows the database in use:
+
+* SQLite: an FTS5 virtual table per model (``<table>_fts``, keyed by the
+  row's primary key), kept in sync by the signal handlers in ``signals.py``;
+* PostgreSQL: a GIN index over ``to_tsvector`` of the searchable columns,
+  which the database maintains itself.
+
+Both are created by migration ``0007_full_text_search``. Set
+``POSTS_SEARCH_BACKEND`` to a dotted path to use another backend; other
+databases get ``None`` and callers fall back to ``LIKE`` matching.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+
+# Searchable columns per model. Keep in step with 0007_full_text_search.
+DOCUMENTS = {
+    Post: ("title", "content"),
+    Comment: ("content",),
+}
+
+
+class SQLiteFTS5Backend:
+    def table(self, model):
+        return f"{model._meta.db_table}_fts"
+
+    def supports(self, model):
+        return model in DOCUMENTS
+
+    def index(self, instance):
+        model = type(instance)
+        columns = DOCUMENTS[model]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT OR REPLACE INTO {} (rowid, {}) VALUES (%s, {})".format(
+                    self.table(model),
+                    ", ".join(columns),
+                    ", ".join(["%s"] * len(columns)),
+                ),
+                [instance.pk, *(getattr(instance, column) for column in columns)],
+            )
+
+    def remove(self, instance):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table(type(instance))} WHERE rowid = %s",
+                [instance.pk],
+            )
+
+    def match_expression(self, text):
+        # Quote every term so user input cannot be read as FTS5 syntax, and
+        # match prefixes like the LIKE search this replaces.
+        terms = re.findall(r"\w+", text)
+        return " ".join('"{}"*'.format(term) for term in terms)
+
+    def search(self, queryset, text):
+        model = queryset.model
+        match = self.match_expression(text)
+        if not match:
+            return queryset.none()
+        table = self.table(model)
+        quote = connection.ops.quote_name
+        pk = f"{quote(model._meta.db_table)}.{quote(model._meta.pk.column)}"
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match])
+        ).annotate(
+            # bm25() is lower for better matches.
+            search_rank=RawSQL(
+                f"SELECT -bm25({table}) FROM {table} "
+                f"WHERE {table} MATCH %s AND {table}.rowid = {pk}",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+
+class PostgresFTSBackend:
+    config = "english"
+
+    def supports(self, model):
+        return model in DOCUMENTS
+
+    def index(self, instance):
+        """The GIN expression index is maintained by PostgreSQL."""
+
+    def remove(self, instance):
+        """The GIN expression index is maintained by PostgreSQL."""
+
+    def document(self, model):
+        # Must match the indexed expression exactly for the index to be used.
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = " || ' ' || ".join(
+            f"coalesce({table}.{column}, '')" for column in DOCUMENTS[model]
+        )
+        return f"to_tsvector('{self.config}'::regconfig, {columns})"
+
+    def search(self, queryset, text):
+        document = self.document(queryset.model)
+        query = f"websearch_to_tsquery('{self.config}'::regconfig, %s)"
+        return queryset.filter(
+            RawSQL(f"{document} @@ {query}", [text], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({document}, {query})", [text], output_field=FloatField()
+            )
+        )
+
+
+_backends = {}
+
+
+def get_search_backend():
+    """The backend for the default database, or ``None`` if it has none."""
+    path = getattr(settings, "POSTS_SEARCH_BACKEND", None)
+    if path is None:
+        path = {
+            "sqlite": "posts.search.SQLiteFTS5Backend",
+            "postgresql": "posts.search.PostgresFTSBackend",
+        }.get(connection.vendor)
+    if path is None:
+        return None
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
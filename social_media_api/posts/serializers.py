@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Post, Comment, Like
 from accounts.serializers import UserSerializer
@@ -21,11 +22,15 @@ class LikeSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at"]
 
 
+class LikeBatchItemSerializer(serializers.Serializer):
+    post = serializers.IntegerField()
+    action = serializers.ChoiceField(choices=["like", "unlike"])
+
+
 class PostSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
-    comment_count = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
+    comments = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(source="like_count", read_only=True)
     is_liked = serializers.SerializerMethodField()
 
     class Meta:
@@ -42,15 +47,24 @@ class PostSerializer(serializers.ModelSerializer):
             "likes_count",
             "is_liked",
         ]
-        read_only_fields = ["id", "created_at", "updated_at"]
-
-    def get_comment_count(self, obj):
-        return obj.comments.count()
+        read_only_fields = ["id", "created_at", "updated_at", "comment_count"]
 
-    def get_likes_count(self, obj):
-        return obj.likes.count()
+    def get_comments(self, obj):
+        # Only the newest few comments are embedded; the whole thread is at
+        # /posts/{id}/comments/. PostViewSet prefetches them as
+        # ``recent_comments`` with a single windowed query.
+        comments = getattr(obj, "recent_comments", None)
+        if comments is None:
+            comments = obj.comments.select_related("author")[
+                : settings.POSTS_RECENT_COMMENTS
+            ]
+        return CommentSerializer(comments, many=True, context=self.context).data
 
     def get_is_liked(self, obj):
+        # Annotated by PostViewSet.get_queryset; the fallback only runs for
+        # instances that did not come from that queryset.
+        if hasattr(obj, "is_liked"):
+            return obj.is_liked
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return Like.objects.filter(post=obj, user=request.user).exists()
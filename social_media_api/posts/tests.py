@@ -0,0 +1,658 @@
+import re
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from accounts.follows import follow
+from notifications.views import NotificationViewSet
+from .models import Comment, Like, Post, TimelineEntry
+from .views import CommentViewSet, PostViewSet
+
+User = get_user_model()
+
+
+class ListQueryIndexTests(TestCase):
+    """
+    The list query of each viewset must be served from an index.
+
+    Runs ``EXPLAIN QUERY PLAN`` on SQLite against the exact queryset a list
+    request would paginate, and fails on a full table scan or on a sort that
+    the index could not satisfy.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("reader", password="password")
+        post = Post.objects.create(author=cls.user, title="Title", content="Body")
+        Comment.objects.create(post=post, author=cls.user, content="Comment")
+        cls.post = post
+
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Query plan assertions are written for SQLite.")
+
+    def list_queryset(self, viewset_class, params):
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, user=self.user)
+        view = viewset_class(action_map={"get": "list"}, format_kwarg=None, kwargs={})
+        view.request = view.initialize_request(request)
+        return view.filter_queryset(view.get_queryset())[:10]
+
+    def assertUsesIndex(self, queryset, table, index_name):
+        plan = queryset.explain()
+        self.assertIsNone(
+            re.search(rf"SCAN {table}\b(?! USING)", plan),
+            f"Full scan of {table}:\n{plan}",
+        )
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan, plan)
+        self.assertIn(index_name, plan, plan)
+
+    def test_post_list_uses_index(self):
+        queryset = self.list_queryset(PostViewSet, {})
+        self.assertEqual(queryset.query.order_by, ("-created_at", "-pk"))
+        self.assertUsesIndex(queryset, "posts_post", "posts_post_created_idx")
+
+    def test_post_list_by_author_uses_index(self):
+        queryset = self.list_queryset(PostViewSet, {"author": self.user.pk})
+        self.assertUsesIndex(queryset, "posts_post", "posts_post_author_created_idx")
+
+    def test_comment_list_by_post_uses_index(self):
+        queryset = self.list_queryset(CommentViewSet, {"post": self.post.pk})
+        self.assertUsesIndex(
+            queryset, "posts_comment", "posts_comment_post_created_idx"
+        )
+
+    def test_comment_list_by_author_uses_index(self):
+        queryset = self.list_queryset(CommentViewSet, {"author": self.user.pk})
+        self.assertUsesIndex(
+            queryset, "posts_comment", "posts_comment_auth_created_idx"
+        )
+
+    def test_notification_list_uses_index(self):
+        queryset = self.list_queryset(NotificationViewSet, {})
+        self.assertUsesIndex(
+            queryset, "notifications_notification", "notif_recipient_created_idx"
+        )
+
+    def test_unread_notification_list_uses_index(self):
+        queryset = self.list_queryset(NotificationViewSet, {"read": "false"})
+        self.assertUsesIndex(
+            queryset, "notifications_notification", "notif_unread_idx"
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ConditionalGetTests(TestCase):
+    """A matching ``If-None-Match`` is answered without serializing posts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.reader = User.objects.create_user("reader", password="password")
+        cls.post = Post.objects.create(author=cls.author, title="Title", content="Body")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def assertRevalidates(self, url, queries):
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_post_detail_returns_304_until_liked(self):
+        url = f"/api/posts/{self.post.pk}/"
+        etag = self.assertRevalidates(url, 1)
+        self.client.post(f"/api/posts/{self.post.pk}/like/")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["is_liked"])
+
+    def test_post_detail_returns_304_until_author_is_followed(self):
+        url = f"/api/posts/{self.post.pk}/"
+        etag = self.assertRevalidates(url, 1)
+        follow(self.reader, self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["author"]["follower_count"], 1)
+
+    def test_post_list_returns_304_until_commented(self):
+        # The page query plus the paginator's COUNT(*).
+        etag = self.assertRevalidates("/api/posts/", 2)
+        Comment.objects.create(post=self.post, author=self.reader, content="Hi")
+        response = self.client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_returns_304_without_queries(self):
+        etag = self.client.get("/api/users/profile/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/users/profile/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, POSTS_RESPONSE_CACHE_TIMEOUT=60)
+class AnonymousResponseCacheTests(TestCase):
+    """
+    Anonymous reads are cached until a post, comment or like is written, or
+    until the embedded author's profile or follow counters change.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.post = Post.objects.create(author=cls.author, title="Title", content="Body")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_repeated_list_is_served_from_cache(self):
+        first = self.client.get("/api/posts/", {"page": 1})
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/posts/", {"page": 1})
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_query_params_are_part_of_the_key(self):
+        other = User.objects.create_user("other", password="password")
+        self.client.get("/api/posts/", {"author": self.author.pk})
+        response = self.client.get("/api/posts/", {"author": other.pk})
+        self.assertEqual(response.data["count"], 0)
+
+    def test_like_invalidates_cached_detail(self):
+        url = f"/api/posts/{self.post.pk}/"
+        self.assertEqual(self.client.get(url).data["likes_count"], 0)
+        liker = APIClient()
+        liker.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            liker.post(f"/api/posts/{self.post.pk}/like/")
+        self.assertEqual(self.client.get(url).data["likes_count"], 1)
+
+    def test_comment_invalidates_cached_list(self):
+        self.client.get("/api/posts/")
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.author, content="Hi")
+        response = self.client.get("/api/posts/")
+        self.assertEqual(len(response.data["results"][0]["comments"]), 1)
+
+    def test_profile_edit_invalidates_embedded_author(self):
+        self.client.get("/api/posts/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.bio = "New bio"
+            self.author.save()
+        response = self.client.get("/api/posts/")
+        self.assertEqual(response.data["results"][0]["author"]["bio"], "New bio")
+
+    def test_follow_invalidates_embedded_author_counters(self):
+        url = f"/api/posts/{self.post.pk}/"
+        self.client.get(url)
+        follower = User.objects.create_user("follower", password="password")
+        with self.captureOnCommitCallbacks(execute=True):
+            follow(follower, self.author)
+        self.assertEqual(self.client.get(url).data["author"]["follower_count"], 1)
+
+    def test_login_keeps_cached_responses(self):
+        self.client.get("/api/posts/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.login(username="author", password="password")
+        self.client.logout()
+        with self.assertNumQueries(0):
+            self.client.get("/api/posts/")
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.force_authenticate(self.author)
+        self.client.get("/api/posts/")
+        with self.assertNumQueries(4):
+            self.client.get("/api/posts/")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_INLINE=True)
+class BatchLikeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.reader = User.objects.create_user("reader", password="password")
+        cls.posts = [
+            Post.objects.create(author=cls.author, title=f"Post {i}", content="Body")
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def batch(self, *items):
+        return self.client.post(
+            "/api/posts/batch_like/",
+            [{"post": post.pk, "action": action} for post, action in items],
+            format="json",
+        )
+
+    def like_counts(self):
+        return [Post.objects.get(pk=post.pk).like_count for post in self.posts]
+
+    def test_replays_items_in_order(self):
+        first, second, third = self.posts
+        Like.objects.create(user=self.reader, post=third)
+        Post.objects.filter(pk=third.pk).update(like_count=1)
+
+        response = self.batch(
+            (first, "like"),
+            (first, "like"),
+            (second, "like"),
+            (second, "unlike"),
+            (third, "unlike"),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["result"] for item in response.data["results"]],
+            ["liked", "already_liked", "liked", "unliked", "unliked"],
+        )
+        self.assertEqual(self.like_counts(), [1, 0, 0])
+
+    def test_replaying_a_batch_twice_counts_each_like_once(self):
+        self.batch((self.posts[0], "like"))
+        self.batch((self.posts[0], "like"))
+        self.assertEqual(self.like_counts(), [1, 0, 0])
+
+    def test_counters_are_set_from_like_rows(self):
+        # As if a concurrent replay had already applied its counter updates.
+        post = self.posts[0]
+        Like.objects.create(user=self.reader, post=post)
+        Like.objects.create(user=self.author, post=post)
+        Post.objects.filter(pk=post.pk).update(like_count=0)
+
+        response = self.batch((post, "unlike"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.like_counts()[0], 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostListQueryTests(TestCase):
+    """Counters and the viewer's like flag cost no per-post queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.reader = User.objects.create_user("reader", password="password")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                author=self.author, title=f"Post {i}", content=""
+            )
+            Comment.objects.create(post=post, author=self.reader, content="Hi")
+            if i % 2:
+                Like.objects.create(user=self.reader, post=post)
+                Post.objects.filter(pk=post.pk).update(like_count=1, comment_count=1)
+
+    def assertListQueries(self):
+        # Validator page, COUNT(*), posts with authors and like flags, comments.
+        with self.assertNumQueries(4):
+            return self.client.get("/api/posts/").data["results"]
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.create_posts(1)
+        self.assertListQueries()
+        self.create_posts(9)
+        results = self.assertListQueries()
+        self.assertEqual(len(results), 10)
+        liked = [post for post in results if post["is_liked"]]
+        self.assertEqual(len(liked), Like.objects.count())
+        self.assertTrue(all(post["likes_count"] == 1 for post in liked))
+        self.assertTrue(all(len(post["comments"]) == 1 for post in results))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostCounterTests(TestCase):
+    """Stored like and comment counters follow the rows they count."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.reader = User.objects.create_user("reader", password="password")
+        cls.post = Post.objects.create(author=cls.author, title="Title", content="Body")
+        cls.other_post = Post.objects.create(
+            author=cls.author, title="Other", content="Body"
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def counters(self, post=None):
+        post = Post.objects.get(pk=(post or self.post).pk)
+        return post.like_count, post.comment_count
+
+    def test_like_and_unlike(self):
+        self.client.post(f"/api/posts/{self.post.pk}/like/")
+        self.assertEqual(self.counters(), (1, 0))
+        self.client.post(f"/api/posts/{self.post.pk}/unlike/")
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_comment_action(self):
+        response = self.client.post(
+            f"/api/posts/{self.post.pk}/comment/",
+            {"post": self.post.pk, "content": "Hi"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counters(), (0, 1))
+
+    def test_comment_viewset_create_move_and_destroy(self):
+        response = self.client.post(
+            "/api/comments/", {"post": self.post.pk, "content": "Hi"}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counters(), (0, 1))
+        url = f"/api/comments/{response.data['id']}/"
+
+        self.client.patch(url, {"post": self.other_post.pk})
+        self.assertEqual(self.counters(), (0, 0))
+        self.assertEqual(self.counters(self.other_post), (0, 1))
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.counters(self.other_post), (0, 0))
+
+    def test_reconcile_command_repairs_drift(self):
+        Like.objects.create(user=self.reader, post=self.post)
+        Comment.objects.create(post=self.post, author=self.reader, content="Hi")
+        Post.objects.filter(pk=self.other_post.pk).update(like_count=3)
+
+        out = StringIO()
+        call_command("reconcile_post_counters", batch_size=1, stdout=out)
+        self.assertEqual(self.counters(), (1, 1))
+        self.assertEqual(self.counters(self.other_post), (0, 0))
+        self.assertIn("repaired 2", out.getvalue())
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    BACKGROUND_TASKS_INLINE=True,
+    FEED_FANOUT_FOLLOWER_THRESHOLD=1,
+)
+class FeedTests(TestCase):
+    """Posts are fanned out to followers, except those of heavy accounts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user("reader", password="password")
+        cls.light = User.objects.create_user("light", password="password")
+        cls.heavy = User.objects.create_user("heavy", password="password")
+        cls.stranger = User.objects.create_user("stranger", password="password")
+        follow(cls.reader, cls.light)
+        follow(cls.reader, cls.heavy)
+        follow(cls.stranger, cls.heavy)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def publish(self, author, title):
+        client = APIClient()
+        client.force_authenticate(author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post("/api/posts/", {"title": title, "content": "Body"})
+        return response.data["id"]
+
+    def test_fan_out_and_heavy_account_merge(self):
+        expected = [
+            self.publish(self.light if i % 2 else self.heavy, f"Post {i}")
+            for i in range(12)
+        ]
+        self.publish(self.stranger, "Not followed")
+        expected.reverse()
+
+        # Only the light account's posts are materialized in the timeline.
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list("post__author", flat=True)),
+            {self.light.pk},
+        )
+        first = self.client.get("/api/feed/").data
+        second = self.client.get(first["next"]).data
+        self.assertEqual(
+            [post["id"] for post in first["results"] + second["results"]], expected
+        )
+        self.assertIsNone(second["next"])
+
+    @override_settings(FEED_BACKFILL_POSTS=2)
+    def test_follow_backfills_recent_posts(self):
+        newcomer = User.objects.create_user("newcomer", password="password")
+        posts = [self.publish(newcomer, f"Post {i}") for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/users/{newcomer.pk}/follow/")
+        self.assertEqual(
+            list(
+                TimelineEntry.objects.filter(owner=self.reader).values_list(
+                    "post", flat=True
+                )
+            ),
+            posts[:0:-1],
+        )
+
+    def test_author_back_at_the_threshold_is_backfilled(self):
+        posts = [self.publish(self.heavy, f"Post {i}") for i in range(2)]
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        stranger = APIClient()
+        stranger.force_authenticate(self.stranger)
+        with self.captureOnCommitCallbacks(execute=True):
+            stranger.post(f"/api/users/{self.heavy.pk}/unfollow/")
+        self.assertEqual(
+            list(
+                TimelineEntry.objects.filter(owner=self.reader).values_list(
+                    "post", flat=True
+                )
+            ),
+            posts[::-1],
+        )
+        response = self.client.get("/api/feed/")
+        self.assertEqual([post["id"] for post in response.data["results"]], posts[::-1])
+
+    def test_unfollow_removes_posts_from_the_timeline(self):
+        self.publish(self.light, "Light")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/users/{self.light.pk}/unfollow/")
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.client.get("/api/feed/").data["results"], [])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTests(TestCase):
+    """``?pagination=cursor`` pages by position, without a COUNT(*)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.posts = [
+            Post.objects.create(author=cls.author, title=f"Post {i}", content="")
+            for i in range(15)
+        ]
+        for post in cls.posts[:12]:
+            Comment.objects.create(post=post, author=cls.author, content="Hi")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def walk(self, url):
+        ids, pages = [], 0
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            self.assertFalse(
+                [q["sql"] for q in queries if "COUNT(" in q["sql"].upper()]
+            )
+            ids += [item["id"] for item in response.data["results"]]
+            url = response.data["next"]
+            pages += 1
+        return ids, pages
+
+    def test_posts_are_paged_newest_first(self):
+        ids, pages = self.walk("/api/posts/?pagination=cursor")
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+        self.assertEqual(pages, 2)
+
+    def test_comments_are_paged_newest_first(self):
+        ids, _ = self.walk("/api/comments/?pagination=cursor")
+        expected = Comment.objects.order_by("-pk").values_list("pk", flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get("/api/posts/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, POSTS_RECENT_COMMENTS=2)
+class RecentCommentsTests(TestCase):
+    """Posts embed their newest comments; the thread is paged separately."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.posts = [
+            Post.objects.create(author=cls.author, title=f"Post {i}", content="")
+            for i in range(2)
+        ]
+        for i in range(12):
+            Comment.objects.create(post=cls.posts[0], author=cls.author, content=f"{i}")
+        Comment.objects.create(post=cls.posts[1], author=cls.author, content="Only")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def test_list_embeds_newest_comments_per_post(self):
+        results = {
+            post["id"]: [comment["content"] for comment in post["comments"]]
+            for post in self.client.get("/api/posts/").data["results"]
+        }
+        self.assertEqual(results[self.posts[0].pk], ["11", "10"])
+        self.assertEqual(results[self.posts[1].pk], ["Only"])
+
+    def test_full_thread_is_paginated(self):
+        url = f"/api/posts/{self.posts[0].pk}/comments/"
+        response = self.client.get(url)
+        self.assertEqual(response.data["count"], 12)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(response.data["results"][0]["content"], "11")
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [comment["content"] for comment in response.data["results"]], ["1", "0"]
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, BACKGROUND_TASKS_INLINE=True)
+class IdempotentLikeTests(TestCase):
+    """Like and unlike are one write each and never fail on a repeat."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+        cls.reader = User.objects.create_user("reader", password="password")
+        cls.post = Post.objects.create(author=cls.author, title="Title", content="Body")
+
+    def setUp(self):
+        # The notification's content type lookup is cached after its first use.
+        ContentType.objects.get_for_model(Post)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_repeated_like_returns_200(self):
+        # Post, SAVEPOINT, INSERT ... ON CONFLICT DO NOTHING, counter, RELEASE.
+        with self.assertNumQueries(5):
+            response = self.client.post(f"/api/posts/{self.post.pk}/like/")
+        self.assertEqual(response.status_code, 201)
+        # The conflicting INSERT is the only write.
+        with self.assertNumQueries(4):
+            response = self.client.post(f"/api/posts/{self.post.pk}/like/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).like_count, 1)
+
+    def test_unlike_is_idempotent(self):
+        Like.objects.create(user=self.reader, post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(like_count=1)
+        # Post, SAVEPOINT, DELETE, counter, RELEASE.
+        with self.assertNumQueries(5):
+            response = self.client.post(f"/api/posts/{self.post.pk}/unlike/")
+        self.assertEqual(response.status_code, 204)
+        with self.assertNumQueries(4):
+            response = self.client.post(f"/api/posts/{self.post.pk}/unlike/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).like_count, 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FullTextSearchTests(TestCase):
+    """The SQLite FTS5 backend, through ``?search=`` on posts and comments."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", password="password")
+
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Exercises the SQLite FTS5 backend.")
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def search(self, text, url="/api/posts/"):
+        response = self.client.get(url, {"search": text})
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data["results"]]
+
+    def indexed_rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}_fts")
+            return cursor.fetchone()[0]
+
+    def test_index_follows_saves_and_deletes(self):
+        post = Post.objects.create(author=self.author, title="Django tips", content="")
+        comment = Comment.objects.create(
+            post=post, author=self.author, content="Great caching advice"
+        )
+        self.assertEqual(self.search("djan"), [post.pk])
+        self.assertEqual(self.search("caching", "/api/comments/"), [comment.pk])
+
+        post.title = "Flask tips"
+        post.save()
+        self.assertEqual(self.search("django"), [])
+        self.assertEqual(self.search("flask"), [post.pk])
+
+        post.delete()
+        self.assertEqual(self.search("flask"), [])
+        self.assertEqual(self.indexed_rows("posts_post"), 0)
+        self.assertEqual(self.indexed_rows("posts_comment"), 0)
+
+    def test_results_are_ranked_by_relevance(self):
+        passing = Post.objects.create(
+            author=self.author, title="Notes", content="One mention of sqlite here."
+        )
+        focused = Post.objects.create(
+            author=self.author, title="SQLite", content="SQLite FTS5 and sqlite tips."
+        )
+        Post.objects.create(author=self.author, title="Other", content="Unrelated.")
+        self.assertEqual(self.search("sqlite"), [focused.pk, passing.pk])
+
+    def test_user_input_is_not_read_as_query_syntax(self):
+        post = Post.objects.create(
+            author=self.author, title="Quotes", content='He said "hello" (NEAR the end)'
+        )
+        for text in ('"', '"hello', "NEAR(", "content:", "hello OR", "*", "-"):
+            self.search(text)
+        self.assertEqual(self.search('"hello" NEAR'), [post.pk])
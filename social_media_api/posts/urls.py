@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet
+from .views import PostViewSet, CommentViewSet, FeedView
 
 router = DefaultRouter()
 router.register(r"posts", PostViewSet)
 router.register(r"comments", CommentViewSet)
 
 urlpatterns = [
+    path("feed/", FeedView.as_view(), name="feed"),
     path("", include(router.urls)),
 ]
 
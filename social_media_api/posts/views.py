@@ -1,11 +1,36 @@
-from rest_framework import viewsets, permissions, filters, status
+from rest_framework import generics, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
-from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.conf import settings
+from django.db.models import (
+    Exists,
+    F,
+    Max,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Value,
+    Window,
+)
+from django.db.models.functions import RowNumber
+from .cache import cache_anonymous_response, invalidate_responses
+from .counters import recount_post_counters
+from .feed import get_feed_page, schedule_fan_out
+from .filters import FullTextSearchFilter, RankedOrderingFilter
 from .models import Post, Comment, Like
-from .serializers import PostSerializer, CommentSerializer, LikeSerializer
-from notifications.models import Notification
+from .serializers import (
+    PostSerializer,
+    CommentSerializer,
+    LikeSerializer,
+    LikeBatchItemSerializer,
+)
+from notifications.dispatch import notify
+from social_media_api.conditional import compute_etag, not_modified, set_validators
+from social_media_api.db import insert_ignore_conflicts
 
 
 class IsAuthorOrReadOnly(permissions.BasePermission):
@@ -15,78 +40,300 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
         return obj.author == request.user
 
 
+def adjust_post_counters(post_id, **deltas):
+    """Apply ``field=delta`` increments to a post's stored counters in SQL."""
+    Post.objects.filter(pk=post_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def recent_comments_prefetch():
+    """The newest POSTS_RECENT_COMMENTS comments of every post, in one query."""
+    ranked = Comment.objects.annotate(
+        recent_rank=Window(
+            RowNumber(),
+            partition_by=F("post_id"),
+            order_by=[F("created_at").desc(), F("id").desc()],
+        )
+    )
+    return Prefetch(
+        "comments",
+        queryset=ranked.filter(
+            recent_rank__lte=settings.POSTS_RECENT_COMMENTS
+        ).select_related("author"),
+        to_attr="recent_comments",
+    )
+
+
+def with_viewer_state(queryset, user):
+    """Load what PostSerializer needs for ``user`` in a fixed number of queries."""
+    if user.is_authenticated:
+        is_liked = Exists(Like.objects.filter(post=OuterRef("pk"), user=user))
+    else:
+        is_liked = Value(False)
+    return (
+        queryset.select_related("author")
+        .prefetch_related(recent_comments_prefetch())
+        .annotate(is_liked=is_liked)
+    )
+
+
+VALIDATOR_FIELDS = (
+    "pk",
+    "created_at",
+    "updated_at",
+    "like_count",
+    "comment_count",
+    "is_liked",
+    "author__updated_at",
+    # Follow counters are moved by UPDATEs that leave updated_at alone.
+    "author__follower_count",
+    "author__following_count",
+    "comments_updated_at",
+)
+
+
+def with_validators(queryset):
+    """
+    Annotate a PostSerializer queryset with what its ETag is built from.
+
+    Edits bump ``updated_at``, likes and comments move the stored counters,
+    and comment edits are caught by the newest comment ``updated_at``.
+    """
+    comments_updated_at = (
+        Comment.objects.filter(post=OuterRef("pk"))
+        .order_by()
+        .values("post")
+        .annotate(latest=Max("updated_at"))
+        .values("latest")
+    )
+    return queryset.prefetch_related(None).annotate(
+        comments_updated_at=Subquery(comments_updated_at)
+    )
+
+
+def post_validators(rows):
+    """The ETag and Last-Modified of a sequence of VALIDATOR_FIELDS rows."""
+    timestamps = [
+        stamp
+        for row in rows
+        for stamp in (row.updated_at, row.author__updated_at, row.comments_updated_at)
+        if stamp
+    ]
+    return compute_etag(*map(tuple, rows)), max(timestamps, default=None)
+
+
 class PostViewSet(viewsets.ModelViewSet):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        FullTextSearchFilter,
+        RankedOrderingFilter,
     ]
     filterset_fields = ["author"]
     search_fields = ["title", "content"]
     ordering_fields = ["created_at", "updated_at"]
-    ordering = ["-created_at"]
+    ordering = ["-created_at", "-pk"]
+
+    def get_permissions(self):
+        # Anyone signed in may like or comment on a post, not just its author.
+        if self.action in ("comment", "like", "unlike", "batch_like"):
+            return [permissions.IsAuthenticated()]
+        return super().get_permissions()
+
+    def get_queryset(self):
+        # The viewer's like flag is computed in the list query itself so
+        # serializing a page never issues per-post queries.
+        return with_viewer_state(super().get_queryset(), self.request.user)
+
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        # Paginate the validator columns first; full rows are only loaded
+        # and serialized when the client's copy is stale.
+        queryset = with_validators(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(
+            queryset.values_list(*VALIDATOR_FIELDS, named=True)
+        )
+        if page is None:
+            return super().list(request, *args, **kwargs)
+        envelope = self.get_paginated_response([]).data
+        etag, last_modified = post_validators(page)
+        etag = compute_etag(etag, sorted(envelope.items()))
+        response = not_modified(request, etag)
+        if response is None:
+            post_ids = [row.pk for row in page]
+            posts = self.get_queryset().in_bulk(post_ids)
+            serializer = self.get_serializer(
+                [posts[pk] for pk in post_ids if pk in posts], many=True
+            )
+            response = self.get_paginated_response(serializer.data)
+        return set_validators(response, etag, last_modified)
+
+    @cache_anonymous_response
+    def retrieve(self, request, *args, **kwargs):
+        queryset = with_validators(self.filter_queryset(self.get_queryset()))
+        try:
+            row = (
+                queryset.filter(pk=kwargs["pk"])
+                .values_list(*VALIDATOR_FIELDS, named=True)
+                .first()
+            )
+        except (TypeError, ValueError):
+            row = None
+        if row is None:
+            # Let the default path produce the 404.
+            return super().retrieve(request, *args, **kwargs)
+        etag, last_modified = post_validators([row])
+        response = not_modified(request, etag) or super().retrieve(
+            request, *args, **kwargs
+        )
+        return set_validators(response, etag, last_modified)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        schedule_fan_out(post)
+
+    @action(detail=True, methods=["get"])
+    def comments(self, request, pk=None):
+        """The full comment thread of a post, paginated."""
+        post = generics.get_object_or_404(Post.objects.only("pk"), pk=pk)
+        queryset = Comment.objects.filter(post=post).select_related("author")
+        page = self.paginate_queryset(queryset)
+        serializer = CommentSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=["post"])
     def comment(self, request, pk=None):
         post = self.get_object()
         serializer = CommentSerializer(data=request.data)
         if serializer.is_valid():
-            comment = serializer.save(post=post, author=request.user)
-            # Create notification for post author
-            if post.author != request.user:
-                Notification.objects.create(
-                    recipient=post.author,
-                    actor=request.user,
-                    verb="comment",
-                    content_type=ContentType.objects.get_for_model(Comment),
-                    object_id=comment.id,
-                )
+            with transaction.atomic():
+                comment = serializer.save(post=post, author=request.user)
+                adjust_post_counters(post.pk, comment_count=1)
+                notify(post.author, request.user, "comment", comment)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=["post"])
     def like(self, request, pk=None):
-        post = self.get_object()
-        if post.likes.filter(user=request.user).exists():
+        post = generics.get_object_or_404(Post.objects.select_related("author"), pk=pk)
+        like = Like(user=request.user, post=post)
+        # A single INSERT ... ON CONFLICT DO NOTHING: repeated or concurrent
+        # likes are no-ops rather than IntegrityErrors.
+        with transaction.atomic():
+            created = insert_ignore_conflicts(like)
+            if created:
+                adjust_post_counters(post.pk, like_count=1)
+                # Raw inserts send no signals, so invalidate explicitly.
+                invalidate_responses()
+                # Likes notify about the post so bursts coalesce into one row.
+                notify(post.author, request.user, "like", post)
+        if not created:
             return Response(
                 {"detail": "You have already liked this post."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        like = Like.objects.create(user=request.user, post=post)
-        serializer = LikeSerializer(like)
-
-        # Create notification for post author
-        if post.author != request.user:
-            Notification.objects.create(
-                recipient=post.author,
-                actor=request.user,
-                verb="like",
-                content_type=ContentType.objects.get_for_model(Like),
-                object_id=like.id,
+                status=status.HTTP_200_OK,
             )
-
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(LikeSerializer(like).data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=["post"])
     def unlike(self, request, pk=None):
-        post = self.get_object()
-        try:
-            like = post.likes.get(user=request.user)
-            like.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except Like.DoesNotExist:
+        post = generics.get_object_or_404(Post.objects.only("pk"), pk=pk)
+        with transaction.atomic():
+            deleted, _ = Like.objects.filter(post=post, user=request.user).delete()
+            if deleted:
+                adjust_post_counters(post.pk, like_count=-deleted)
+                invalidate_responses()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"])
+    def batch_like(self, request):
+        """
+        Apply a list of ``{"post": id, "action": "like"|"unlike"}`` in order.
+
+        Items are replayed in memory against the caller's current likes, then
+        only the net change is written: one bulk insert, one bulk delete and
+        one counter update, whatever the batch size. The counters are recounted
+        from the like rows rather than moved by the expected change, which a
+        concurrent replay of the same batch may already have applied.
+        """
+        items = LikeBatchItemSerializer(data=request.data, many=True)
+        items.is_valid(raise_exception=True)
+        if len(items.validated_data) > settings.POSTS_LIKE_BATCH_MAX:
             return Response(
-                {"detail": "You have not liked this post."},
+                {"detail": f"At most {settings.POSTS_LIKE_BATCH_MAX} items per batch."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        post_ids = {item["post"] for item in items.validated_data}
+        posts = Post.objects.select_related("author").in_bulk(post_ids)
+        existing = set(
+            Like.objects.filter(user=request.user, post_id__in=post_ids).values_list(
+                "post_id", flat=True
+            )
+        )
+
+        liked = set(existing)
+        results = []
+        for item in items.validated_data:
+            post_id = item["post"]
+            if post_id not in posts:
+                outcome = "not_found"
+            elif item["action"] == "like":
+                outcome = "already_liked" if post_id in liked else "liked"
+                liked.add(post_id)
+            else:
+                outcome = "unliked" if post_id in liked else "not_liked"
+                liked.discard(post_id)
+            results.append({"post": post_id, "action": item["action"], "result": outcome})
+
+        added = liked - existing
+        removed = existing - liked
+        with transaction.atomic():
+            if added:
+                Like.objects.bulk_create(
+                    [Like(user=request.user, post_id=post_id) for post_id in added],
+                    ignore_conflicts=True,
+                )
+            if removed:
+                Like.objects.filter(
+                    user=request.user, post_id__in=removed
+                ).delete()
+            if added or removed:
+                recount_post_counters(added | removed, fields=["like_count"])
+                invalidate_responses()
+            for post_id in added:
+                notify(posts[post_id].author, request.user, "like", posts[post_id])
+
+        return Response({"results": results})
+
+
+class FeedView(generics.GenericAPIView):
+    """Posts from followed accounts, newest first, paginated by cursor."""
+
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        post_ids, next_cursor = get_feed_page(
+            request.user,
+            cursor=request.query_params.get("cursor"),
+            page_size=api_settings.PAGE_SIZE,
+        )
+        posts = with_viewer_state(Post.objects.all(), request.user).in_bulk(post_ids)
+        serializer = self.get_serializer(
+            [posts[pk] for pk in post_ids if pk in posts], many=True
+        )
+        next_url = None
+        if next_cursor:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", next_cursor
+            )
+        return Response({"next": next_url, "results": serializer.data})
+
 
 class CommentViewSet(viewsets.ModelViewSet):
     queryset = Comment.objects.all()
@@ -94,15 +341,33 @@ class CommentViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        FullTextSearchFilter,
+        RankedOrderingFilter,
     ]
     filterset_fields = ["post", "author"]
     search_fields = ["content"]
     ordering_fields = ["created_at", "updated_at"]
     ordering = ["-created_at"]
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
-        ["Post.objects.filter(author__in=following_users).order_by", "following.all()"]
+        comment = serializer.save(author=self.request.user)
+        adjust_post_counters(comment.post_id, comment_count=1)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_post_id = serializer.instance.post_id
+        comment = serializer.save()
+        if comment.post_id != previous_post_id:
+            adjust_post_counters(previous_post_id, comment_count=-1)
+            adjust_post_counters(comment.post_id, comment_count=1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        instance.delete()
+        adjust_post_counters(post_id, comment_count=-1)
+
+
+["Post.objects.filter(author__in=following_users).order_by", "following.all()"]
 ["generics.get_object_or_404(Post, pk=pk)", "Like.objects.get_or_create(user=request.user, post=post)"]
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""
+Run side effects of a request outside of it.
+
+``run_in_background`` queues a callable as a job once the current
+transaction commits; ``manage.py runworker`` picks it up (see the ``jobs``
+app), so the request only pays for its own writes. The callable must be a
+module-level function and its arguments JSON-serializable. Set
+``BACKGROUND_TASKS_INLINE`` to run the callable synchronously on commit
+instead (useful in tests and one-off scripts).
+"""
+
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from jobs.queue import enqueue_on_commit
+
+
+def run_in_background(func, *args, **kwargs):
+    """Call ``func(*args, **kwargs)`` once the current transaction commits."""
+    if getattr(settings, "BACKGROUND_TASKS_INLINE", False):
+        transaction.on_commit(partial(func, *args, **kwargs))
+    else:
+        enqueue_on_commit(func, *args, **kwargs)
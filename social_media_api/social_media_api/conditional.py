@@ -0,0 +1,36 @@
+"""
+ETag / Last-Modified support for API views.
+
+Validators are computed from a few cheap columns (timestamps and stored
+counters) rather than from the rendered body, so a matching
+``If-None-Match`` is answered with 304 before any serializer runs.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+def compute_etag(*parts):
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request, etag):
+    """
+    A 304 response if ``If-None-Match`` matches ``etag``, else ``None``.
+
+    Stored counters change without touching ``updated_at``, so
+    ``If-Modified-Since`` alone is never trusted to produce a 304.
+    """
+    return get_conditional_response(request, etag=etag)
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # Representations include per-viewer state such as ``is_liked``.
+    patch_vary_headers(response, ("Authorization", "Cookie"))
+    return response
@@ -0,0 +1,55 @@
+"""
+Database helpers shared by the apps.
+"""
+
+from django.db import IntegrityError, connections, router, transaction
+
+
+def insert_ignore_conflicts(instance):
+    """
+    Insert ``instance`` unless that would violate a unique constraint.
+
+    Returns ``True`` if a row was written (and sets ``instance.pk``), or
+    ``False`` if an equal row already existed. On SQLite and PostgreSQL this
+    is a single ``INSERT ... ON CONFLICT DO NOTHING`` statement, so two
+    concurrent inserts of the same row cannot race into an IntegrityError.
+    """
+    model = type(instance)
+    meta = model._meta
+    using = router.db_for_write(model, instance=instance)
+    connection = connections[using]
+
+    if connection.vendor not in ("sqlite", "postgresql"):
+        try:
+            with transaction.atomic(using=using):
+                instance.save(force_insert=True, using=using)
+        except IntegrityError:
+            return False
+        return True
+
+    quote = connection.ops.quote_name
+    fields = [field for field in meta.concrete_fields if not field.primary_key]
+    values = [
+        field.get_db_prep_save(field.pre_save(instance, add=True), connection)
+        for field in fields
+    ]
+    sql = "INSERT INTO {} ({}) VALUES ({}) ON CONFLICT DO NOTHING".format(
+        quote(meta.db_table),
+        ", ".join(quote(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    returning = connection.features.can_return_columns_from_insert
+    if returning:
+        sql += f" RETURNING {quote(meta.pk.column)}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values)
+        if not returning:
+            return cursor.rowcount == 1
+        row = cursor.fetchone()
+    if row is None:
+        return False
+    instance.pk = row[0]
+    instance._state.adding = False
+    instance._state.db = using
+    return True
@@ -0,0 +1,113 @@
+"""
+Keyset (cursor) pagination for lists ordered by ``(created_at, id)``.
+
+A cursor is the position of the last row a client has seen, so the next
+page is a bounded index range scan instead of an ``OFFSET``.
+"""
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """Return the ``(created_at, pk)`` position stored in ``cursor``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = raw.split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, ValueError, UnicodeError):
+        raise NotFound("Invalid cursor")
+
+
+def keyset_filter(created_at, pk, pk_field="pk"):
+    """Rows strictly after ``(created_at, pk)`` in descending order."""
+    return Q(created_at__lt=created_at) | Q(
+        created_at=created_at, **{f"{pk_field}__lt": pk}
+    )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over ``(-created_at, -id)``.
+
+    Each page is one bounded range query on a ``(created_at, id)`` index and
+    no ``COUNT(*)`` is issued, so page cost does not grow with depth.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(keyset_filter(*decode_cursor(cursor)))
+        rows = list(queryset.order_by("-created_at", "-pk")[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        page = rows[: self.page_size]
+        if self.has_next:
+            self.next_cursor = encode_cursor(page[-1].created_at, page[-1].pk)
+        return page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor,
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; keyset pagination on request.
+
+    Clients opt in with ``?pagination=cursor`` (or by following a ``next``
+    link that carries a ``cursor``). In that mode results are always ordered
+    newest first and the response has no ``count``.
+    """
+
+    mode_query_param = "pagination"
+
+    def uses_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.uses_keyset(request):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
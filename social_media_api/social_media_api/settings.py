@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     "accounts",
     "posts",
     "notifications",
+    "jobs",
 ]
 
 MIDDLEWARE = [
@@ -103,6 +104,21 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# The local-memory default is per process; point CACHE_BACKEND/CACHE_LOCATION
+# at a shared cache (Redis, Memcached) when running several workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="social-media-api"),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -154,7 +170,7 @@ AUTH_USER_MODEL = "accounts.CustomUser"
 
 # REST Framework settings
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "social_media_api.pagination.PageNumberOrKeysetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -162,11 +178,87 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "accounts.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
 }
 
+# Seconds a user's cached follower/following ID set lives (accounts/graph.py).
+ACCOUNTS_GRAPH_CACHE_TIMEOUT = config(
+    "ACCOUNTS_GRAPH_CACHE_TIMEOUT", default=3600, cast=int
+)
+
+# Token authentication cache (accounts/authentication.py): per-process LRU
+# size and entry lifetime in seconds, plus an optional cache alias shared by
+# all processes (e.g. a Redis-backed entry in CACHES).
+ACCOUNTS_TOKEN_CACHE_SIZE = config("ACCOUNTS_TOKEN_CACHE_SIZE", default=10000, cast=int)
+ACCOUNTS_TOKEN_CACHE_TTL = config("ACCOUNTS_TOKEN_CACHE_TTL", default=60, cast=int)
+ACCOUNTS_TOKEN_CACHE_SHARED = config("ACCOUNTS_TOKEN_CACHE_SHARED", default="")
+
+# Square avatar renditions generated for every profile picture upload, by
+# label and edge length in pixels, and their WebP/JPEG quality.
+ACCOUNTS_AVATAR_SIZES = {"small": 48, "medium": 96, "large": 192}
+ACCOUNTS_AVATAR_QUALITY = config("ACCOUNTS_AVATAR_QUALITY", default=80, cast=int)
+
+# Number of newest comments embedded in each post; the full thread is served
+# paginated from /api/posts/{id}/comments/.
+POSTS_RECENT_COMMENTS = config("POSTS_RECENT_COMMENTS", default=3, cast=int)
+
+# Maximum number of items accepted by /api/posts/batch_like/.
+POSTS_LIKE_BATCH_MAX = config("POSTS_LIKE_BATCH_MAX", default=1000, cast=int)
+
+# Seconds an anonymous post list/detail response is cached (posts/cache.py).
+# Post, comment and like writes invalidate immediately; the timeout bounds
+# staleness of embedded author data such as follower counts. 0 disables it.
+POSTS_RESPONSE_CACHE_TIMEOUT = config(
+    "POSTS_RESPONSE_CACHE_TIMEOUT", default=60, cast=int
+)
+
+# Background side effects (see social_media_api/background.py). Queued jobs
+# are run by ``manage.py runworker``; inline mode runs them on commit.
+BACKGROUND_TASKS_INLINE = config("BACKGROUND_TASKS_INLINE", default=False, cast=bool)
+
+# Job queue (jobs/worker.py). A failed job is retried after
+# JOBS_RETRY_BACKOFF * 2 ** (attempts - 1) seconds, capped at
+# JOBS_RETRY_BACKOFF_MAX, until it has run JOBS_MAX_ATTEMPTS times.
+JOBS_MAX_ATTEMPTS = config("JOBS_MAX_ATTEMPTS", default=5, cast=int)
+JOBS_RETRY_BACKOFF = config("JOBS_RETRY_BACKOFF", default=5, cast=int)
+JOBS_RETRY_BACKOFF_MAX = config("JOBS_RETRY_BACKOFF_MAX", default=3600, cast=int)
+# Seconds after which a running job whose worker died is claimed again.
+JOBS_LOCK_TIMEOUT = config("JOBS_LOCK_TIMEOUT", default=600, cast=int)
+JOBS_CLAIM_BATCH_SIZE = config("JOBS_CLAIM_BATCH_SIZE", default=20, cast=int)
+
+# Home feed: authors with more followers than this are merged in at read
+# time instead of being fanned out to every follower's timeline.
+FEED_FANOUT_FOLLOWER_THRESHOLD = config(
+    "FEED_FANOUT_FOLLOWER_THRESHOLD", default=5000, cast=int
+)
+FEED_FANOUT_BATCH_SIZE = config("FEED_FANOUT_BATCH_SIZE", default=1000, cast=int)
+# How many of an author's newest posts are copied into a timeline when it
+# starts receiving their posts (a new follow, or the author dropping back to
+# the threshold).
+FEED_BACKFILL_POSTS = config("FEED_BACKFILL_POSTS", default=20, cast=int)
+
+# Unread notifications for the same recipient, verb and target created within
+# this many seconds are folded into one row ("N users liked your post").
+NOTIFICATIONS_COALESCE_WINDOW = config(
+    "NOTIFICATIONS_COALESCE_WINDOW", default=3600, cast=int
+)
+
+# Seconds a cached unread notification count lives before it is recounted.
+NOTIFICATIONS_UNREAD_CACHE_TIMEOUT = config(
+    "NOTIFICATIONS_UNREAD_CACHE_TIMEOUT", default=300, cast=int
+)
+
+# Notification stream (notifications/pubsub.py). The in-memory broker only
+# reaches clients connected to the same process.
+NOTIFICATIONS_PUBSUB_BACKEND = config(
+    "NOTIFICATIONS_PUBSUB_BACKEND", default="notifications.pubsub.InMemoryBroker"
+)
+NOTIFICATIONS_STREAM_HEARTBEAT = config(
+    "NOTIFICATIONS_STREAM_HEARTBEAT", default=15, cast=int
+)
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 X_FRAME_OPTIONS = "DENY"